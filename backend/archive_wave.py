@@ -0,0 +1,144 @@
+import asyncio
+import json
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+from datetime import datetime, timezone
+import pyarrow as pa
+from collections import Counter
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+ARCHIVE_DIR = Path(os.environ.get('ARCHIVE_DIR', ROOT_DIR / 'archive'))
+BATCH_SIZE = 5000
+
+# Dynamic question answers don't fit a fixed columnar schema, so they are
+# kept as a JSON string column next to the fixed outlet fields
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("wave_id", pa.string()),
+    ("branch", pa.string()),
+    ("section", pa.string()),
+    ("wd_destination", pa.string()),
+    ("dms_id_name", pa.string()),
+    ("submitted_at", pa.string()),
+    ("search_text", pa.string()),
+    ("responses", pa.string()),
+    ("answer_version", pa.int64()),
+])
+
+def to_record_batch(docs):
+    columns = {name: [] for name in ARCHIVE_SCHEMA.names}
+    for doc in docs:
+        for name in ARCHIVE_SCHEMA.names:
+            if name == "responses":
+                columns[name].append(json.dumps(doc.get("responses", {}), default=str))
+            elif name == "answer_version":
+                columns[name].append(doc.get("answer_version"))
+            else:
+                value = doc.get(name)
+                columns[name].append(None if value is None else str(value))
+    return pa.record_batch([columns[name] for name in ARCHIVE_SCHEMA.names], schema=ARCHIVE_SCHEMA)
+
+async def archive_wave(wave_id):
+    # Returns True once the wave is on disk and out of survey_responses
+    wave = await db.survey_waves.find_one({"id": wave_id})
+    if not wave:
+        print(f"Wave {wave_id} not found")
+        return False
+    if wave["status"] != "closed":
+        print(f"Wave {wave_id} is still open - close it before archiving")
+        return False
+    if wave.get("archived"):
+        print(f"Wave {wave_id} is already archived at {wave['archive_path']}")
+        return False
+    
+    expected = await db.survey_responses.count_documents({"wave_id": wave_id})
+    
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    # Uncompressed Arrow IPC, so the server can memory-map it and read
+    # columns without decompressing the whole table into RAM
+    archive_path = ARCHIVE_DIR / f"{wave_id}.arrow"
+    tmp_path = archive_path.with_suffix(".arrow.tmp")
+    
+    # Stream the wave out in batches so memory stays flat regardless of size
+    archived_ids = []
+    by_branch, by_section, outlets = Counter(), Counter(), set()
+    cursor = db.survey_responses.find({"wave_id": wave_id}, {"_id": 0}).batch_size(BATCH_SIZE)
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, ARCHIVE_SCHEMA) as writer:
+        batch = []
+        async for doc in cursor:
+            batch.append(doc)
+            by_branch[doc.get("branch")] += 1
+            by_section[doc.get("section")] += 1
+            outlets.add(doc.get("dms_id_name"))
+            if len(batch) == BATCH_SIZE:
+                writer.write_batch(to_record_batch(batch))
+                archived_ids.extend(d["id"] for d in batch)
+                batch = []
+        if batch:
+            writer.write_batch(to_record_batch(batch))
+            archived_ids.extend(d["id"] for d in batch)
+    
+    # Verify what landed on disk before touching the hot collection
+    written = len(archived_ids)
+    with pa.memory_map(str(tmp_path)) as source:
+        stored = pa.ipc.open_file(source).read_all().num_rows
+    if stored != expected or written != expected:
+        tmp_path.unlink()
+        print(f"Count mismatch for wave {wave_id}: expected {expected}, wrote {written}, stored {stored}")
+        return False
+    tmp_path.replace(archive_path)
+    
+    update = {
+        "archived": True,
+        "archive_path": str(archive_path),
+        "archived_count": stored,
+        "archived_at": datetime.now(timezone.utc).isoformat()
+    }
+    # The server can't summarize the wave once its responses leave Mongo
+    if not wave.get("summary"):
+        update["summary"] = {
+            "total_responses": stored,
+            "responses_by_branch": [{"branch": b, "count": c} for b, c in by_branch.most_common()],
+            "responses_by_section": [{"section": s, "count": c} for s, c in by_section.most_common()],
+            "recent_responses": 0,
+            "completed_outlets": len(outlets)
+        }
+    await db.survey_waves.update_one({"id": wave_id}, {"$set": update})
+    # Only delete what was written; anything tagged with the wave after the
+    # cursor finished stays in survey_responses
+    deleted = 0
+    for start in range(0, len(archived_ids), BATCH_SIZE):
+        result = await db.survey_responses.delete_many(
+            {"wave_id": wave_id, "id": {"$in": archived_ids[start:start + BATCH_SIZE]}}
+        )
+        deleted += result.deleted_count
+    print(f"✓ Archived {stored} responses to {archive_path}")
+    print(f"✓ Removed {deleted} responses from survey_responses")
+    
+    remaining = await db.survey_responses.count_documents({"wave_id": wave_id})
+    if remaining:
+        print(f"⚠ {remaining} responses arrived after archiving started and were left in place")
+    return True
+
+async def main(wave_id):
+    try:
+        return await archive_wave(wave_id)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python archive_wave.py <wave_id>")
+        sys.exit(1)
+    if not asyncio.run(main(sys.argv[1])):
+        sys.exit(1)
+    print("✓ Archival complete!")
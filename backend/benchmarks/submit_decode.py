@@ -0,0 +1,103 @@
+"""
+Micro-benchmark: per-request CPU for decoding a survey submission.
+
+Compares the previous Pydantic path (SurveySubmission with extra fields,
+model_dump, copy into a responses dict, then search text and compact
+encoding as separate passes) with SubmissionDecoder, which builds the
+stored document from the raw body in one pass.
+
+Only body decoding is timed. Routing, the rate limiter, the Mongo insert,
+the rollup upsert and cache updates are the same on both paths and are not
+included, so the saving is a share of decoding, not of the whole request.
+The decoder lookup adds no I/O: with COMPACT_ANSWERS off it is a constant,
+with it on it comes from the TTL-cached question set.
+
+    cd backend && python benchmarks/submit_decode.py [iterations]
+"""
+import os
+import sys
+import json
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# server connects lazily; nothing here talks to Mongo
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'benchmark')
+
+from server import (  # noqa: E402
+    SurveySubmission, AnswerCodec, SubmissionDecoder, extract_search_text
+)
+
+# Shaped like the seeded survey: single and multi selects with a free-text "other"
+QUESTIONS = [
+    {"question_number": 1, "question_type": "single", "options": [{"value": v} for v in ("<Rs 1k", "Rs 1k-5k", "Rs 5k-10k", ">Rs 10k")]},
+    {"question_number": 2, "question_type": "single", "options": [{"value": v} for v in ("Daily", "Weekly", "Fortnightly", "Monthly")]},
+    {"question_number": 3, "question_type": "multi", "options": [{"value": v} for v in ("WD", "Wholesale", "Cash & Carry", "Other")]},
+    {"question_number": 4, "question_type": "single", "options": [{"value": v} for v in ("Yes", "No")]},
+    {"question_number": 5, "question_type": "multi", "options": [{"value": v} for v in ("Credit", "Schemes", "Visibility", "Range", "Other")]},
+    {"question_number": 6, "question_type": "single", "options": [{"value": v} for v in ("1", "2", "3", "4", "5")]},
+    {"question_number": 7, "question_type": "multi", "options": [{"value": v} for v in ("Delivery delay", "Stock-outs", "Relationship issue")]},
+]
+
+BODY = json.dumps({
+    "branch": "Kolkata",
+    "section": "Section 12",
+    "wd_destination": "Howrah WD",
+    "dms_id_name": "DMS12345 - Sharma General Store",
+    "q1": "Rs 5k-10k",
+    "q2": "Weekly",
+    "q3": ["WD", "Wholesale"],
+    "q4": "Yes",
+    "q5": ["Credit", "Schemes", "Other"],
+    "q5_conditional": "Wants longer credit period",
+    "q6": "4",
+    "q7": ["Stock-outs", "Relationship issue"],
+    "q7_conditional": "Salesman visits irregular",
+}).encode()
+
+def legacy_decode(body, codec):
+    # FastAPI parses the body with json.loads before validating the model
+    submission = SurveySubmission.model_validate(json.loads(body))
+    doc = {
+        "branch": submission.branch,
+        "section": submission.section,
+        "wd_destination": submission.wd_destination,
+        "dms_id_name": submission.dms_id_name,
+    }
+    extra_data = submission.model_dump(exclude={"branch", "section", "wd_destination", "dms_id_name"})
+    responses = {}
+    for key, value in extra_data.items():
+        responses[key] = value
+    doc["responses"] = responses
+    doc["search_text"] = extract_search_text(responses)
+    if codec is not None:
+        doc["responses"] = {key: codec.encode_value(key, value) for key, value in responses.items()}
+        doc["answer_version"] = codec.version
+    return doc, responses
+
+def measure(label, func, iterations):
+    for _ in range(1000):
+        func()
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    per_request = (time.process_time() - started) / iterations * 1e6
+    print(f"  {label:<10} {per_request:8.2f} µs/request")
+    return per_request
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for compact in (False, True):
+        codec = AnswerCodec(1, QUESTIONS) if compact else None
+        decoder = SubmissionDecoder(codec)
+        # Both paths must build the same document
+        assert legacy_decode(BODY, codec) == decoder.decode(BODY)
+        
+        print(f"COMPACT_ANSWERS={'on' if compact else 'off'} ({iterations} iterations)")
+        before = measure("pydantic", lambda: legacy_decode(BODY, codec), iterations)
+        after = measure("decoder", lambda: decoder.decode(BODY), iterations)
+        print(f"  {1 - after / before:.0%} less decode CPU per request\n")
+
+if __name__ == "__main__":
+    main()
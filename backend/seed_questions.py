@@ -4,6 +4,7 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 from datetime import datetime, timezone
+from pymongo import ReplaceOne, DeleteMany
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -13,9 +14,6 @@ client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
 async def seed_questions():
-    # Clear existing questions
-    await db.survey_questions.delete_many({})
-    
     # Existing 7 questions from the survey
     questions = [
         {
@@ -146,7 +144,18 @@ async def seed_questions():
         }
     ]
     
-    await db.survey_questions.insert_many(questions)
+    # Upsert the seeded set and drop anything else in one ordered bulk write,
+    # so live surveys never see an empty question list mid-seed
+    for q in questions:
+        q["position"] = q["question_number"]
+    operations = [ReplaceOne({"id": q["id"]}, q, upsert=True) for q in questions]
+    operations.append(DeleteMany({"id": {"$nin": [q["id"] for q in questions]}}))
+    await db.survey_questions.bulk_write(operations, ordered=True)
+    await db.survey_meta.update_one(
+        {"_id": "question_set"},
+        {"$inc": {"version": 1}, "$max": {"last_question_number": max(q["question_number"] for q in questions)}},
+        upsert=True
+    )
     print(f"✓ Seeded {len(questions)} questions into database")
     
     client.close()
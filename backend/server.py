@@ -1,27 +1,44 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request
 from fastapi.responses import StreamingResponse
+from fastapi.exceptions import RequestValidationError
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import InsertOne, UpdateOne, ReplaceOne, DeleteOne, DeleteMany, ReturnDocument
+from pymongo.errors import OperationFailure, DuplicateKeyError
 import os
+import re
+import json
+import time
+import hmac
+import base64
+import hashlib
+import ipaddress
+import secrets
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from collections import OrderedDict
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+from urllib.parse import unquote
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import zipfile
 import io
-import xlsxwriter
 import bcrypt
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', '10')))
 db = client[os.environ['DB_NAME']]
 
-app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
 # Models
@@ -54,6 +71,7 @@ class AdminLogin(BaseModel):
 class AdminResponse(BaseModel):
     token: str
     email: str
+    expires_at: str
 
 class QuestionOption(BaseModel):
     value: str
@@ -61,7 +79,8 @@ class QuestionOption(BaseModel):
 
 class SurveyQuestion(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    question_number: int
+    question_number: int  # answer key (q{n}); never changes once assigned
+    position: int = 0  # display order
     question_text: str
     question_type: str  # "single", "multi", "text"
     options: List[QuestionOption] = []
@@ -72,7 +91,7 @@ class SurveyQuestion(BaseModel):
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class QuestionCreate(BaseModel):
-    question_number: int
+    question_number: Optional[int] = None  # used if never taken, else allocated
     question_text: str
     question_type: str
     options: List[QuestionOption] = []
@@ -88,22 +107,1045 @@ class QuestionUpdate(BaseModel):
     has_conditional_input: Optional[bool] = None
     conditional_trigger: Optional[str] = None
 
-# Simple auth check
-def verify_admin(email: str, password: str) -> bool:
-    return email == "vickyvikas@itc.in" and password == "vickyvikas"
+class QuestionSetItem(QuestionCreate):
+    id: Optional[str] = None
+    question_number: Optional[int] = None  # ignored; existing ids keep theirs, new ones are allocated
+
+class QuestionSetReplace(BaseModel):
+    questions: List[QuestionSetItem]
+
+class WaveCreate(BaseModel):
+    name: str
+
+# Admin authentication
+# Tokens are "<payload>.<signature>" with an HMAC-SHA256 signature over
+# "email|expiry", so every admin request is verified in-process without a
+# session lookup. The HMAC key schedule is computed once and copied per check.
+ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'vickyvikas@itc.in')
+ADMIN_PASSWORD_HASH = os.environ.get(
+    'ADMIN_PASSWORD_HASH',
+    '$2b$12$OIvdAAnLcc9hDJzXJYiMJufmLmLqrlZJEM2xcVQpjZ8YnNdsjKyPC'
+).encode()
+ADMIN_TOKEN_TTL_SECONDS = int(os.environ.get('ADMIN_TOKEN_TTL_HOURS', '12')) * 3600
+VERIFIED_TOKEN_CACHE_SIZE = 1024
+
+_token_secret = os.environ.get('ADMIN_TOKEN_SECRET')
+if not _token_secret:
+    logging.warning("ADMIN_TOKEN_SECRET not set; admin tokens will not survive a restart")
+    _token_secret = secrets.token_hex(32)
+_token_key = hashlib.sha256(b"itc-survey-admin-token:" + _token_secret.encode()).digest()
+_token_mac = hmac.new(_token_key, digestmod=hashlib.sha256)
+_verified_tokens: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _sign(payload: bytes) -> bytes:
+    mac = _token_mac.copy()
+    mac.update(payload)
+    return mac.digest()
+
+def issue_admin_token(email: str) -> Tuple[str, int]:
+    expires = int(time.time()) + ADMIN_TOKEN_TTL_SECONDS
+    payload = f"{email}|{expires}".encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}", expires
+
+def verify_admin_token(token: str) -> Optional[str]:
+    # Returns the admin email for a valid, unexpired token
+    now = time.time()
+    cached = _verified_tokens.get(token)
+    if cached is not None:
+        if cached[1] > now:
+            _verified_tokens.move_to_end(token)
+            return cached[0]
+        del _verified_tokens[token]
+        return None
+    
+    try:
+        payload_part, signature_part = token.split(".")
+        payload = _b64decode(payload_part)
+        if not hmac.compare_digest(_sign(payload), _b64decode(signature_part)):
+            return None
+        email, expires = payload.decode().rsplit("|", 1)
+        expires = int(expires)
+    except ValueError:
+        return None
+    if expires <= now:
+        return None
+    
+    _verified_tokens[token] = (email, expires)
+    if len(_verified_tokens) > VERIFIED_TOKEN_CACHE_SIZE:
+        _verified_tokens.popitem(last=False)
+    return email
+
+async def verify_admin(email: str, password: str) -> bool:
+    # bcrypt is deliberately slow; keep it off the event loop
+    email_ok = hmac.compare_digest(email.lower().encode(), ADMIN_EMAIL.lower().encode())
+    password_ok = await asyncio.to_thread(bcrypt.checkpw, password.encode(), ADMIN_PASSWORD_HASH)
+    return email_ok and password_ok
+
+def _bearer_token(request: Request) -> Optional[str]:
+    auth = request.headers.get("authorization", "")
+    return auth[7:] if auth[:7].lower() == "bearer " else None
+
+def _authenticate(token: Optional[str]) -> str:
+    email = verify_admin_token(token) if token else None
+    if email is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Admin authentication required",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return email
+
+async def require_admin(request: Request) -> str:
+    return _authenticate(_bearer_token(request))
+
+async def require_stream_admin(request: Request) -> str:
+    # EventSource can't set headers, so the stream alone may pass ?token=;
+    # everywhere else tokens stay out of URLs and access logs
+    return _authenticate(_bearer_token(request) or request.query_params.get("token"))
+
+admin_router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+# Rate limiting and admission control
+# Token buckets cap how often one client may hit a route; semaphores cap how
+# many expensive requests run at once, queueing briefly before answering 429.
+RATE_LIMITS = {
+    "submit": (float(os.environ.get('SUBMIT_RATE_PER_MINUTE', '30')) / 60, int(os.environ.get('SUBMIT_BURST', '10'))),
+    "export": (float(os.environ.get('EXPORT_RATE_PER_MINUTE', '6')) / 60, int(os.environ.get('EXPORT_BURST', '2'))),
+}
+CONCURRENCY_LIMITS = {
+    "export": int(os.environ.get('EXPORT_CONCURRENCY', '2')),
+    "stats": int(os.environ.get('STATS_CONCURRENCY', '4')),
+    "responses": int(os.environ.get('RESPONSES_CONCURRENCY', '8')),
+}
+ADMISSION_QUEUE_SECONDS = float(os.environ.get('ADMISSION_QUEUE_SECONDS', '5'))
+MAX_TRACKED_CLIENTS = 10000
+# Reverse proxies (IPs or CIDRs) whose X-Forwarded-For entries are trusted.
+# The default covers loopback and the private ranges the cluster ingress
+# connects from, so field users behind it get their own buckets; set it to
+# the ingress addresses (or empty, to use the peer address as-is) when the
+# server is reachable without going through the ingress
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in os.environ.get(
+        'TRUSTED_PROXIES', '127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16'
+    ).split(',') if entry.strip()
+]
+_untrusted_forwarding_warned = False
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+    
+    def take(self) -> float:
+        # Returns 0 when a token was taken, else seconds until one is available
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+_buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+_semaphores = {scope: asyncio.Semaphore(limit) for scope, limit in CONCURRENCY_LIMITS.items()}
+_admission_metrics = {
+    scope: {"allowed": 0, "rate_limited": 0, "queued": 0, "rejected": 0, "in_flight": 0}
+    for scope in set(RATE_LIMITS) | set(CONCURRENCY_LIMITS)
+}
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+def client_address(request: Request) -> str:
+    # Walk X-Forwarded-For from the nearest hop and stop at the first address
+    # not added by one of our own proxies; anything further left is client
+    # supplied and can't be trusted
+    global _untrusted_forwarding_warned
+    host = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for", "")
+    if not _is_trusted_proxy(host):
+        if forwarded and not _untrusted_forwarding_warned:
+            # Every client behind that proxy now shares one rate-limit bucket
+            logging.warning(
+                f"X-Forwarded-For received from {host}, which is not in TRUSTED_PROXIES; "
+                "rate limits apply to the proxy address"
+            )
+            _untrusted_forwarding_warned = True
+        return host
+    for hop in reversed([hop.strip() for hop in forwarded.split(",") if hop.strip()]):
+        host = hop
+        if not _is_trusted_proxy(hop):
+            break
+    return host
+
+def _take_token(scope: str, rate: float, burst: int, key: str):
+    bucket_key = (scope, key)
+    bucket = _buckets.get(bucket_key)
+    if bucket is None:
+        bucket = _buckets[bucket_key] = TokenBucket(rate, burst)
+        if len(_buckets) > MAX_TRACKED_CLIENTS:
+            _buckets.popitem(last=False)
+    else:
+        _buckets.move_to_end(bucket_key)
+    
+    retry_after = bucket.take()
+    if retry_after:
+        _admission_metrics[scope]["rate_limited"] += 1
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(int(retry_after) + 1)}
+        )
+    if scope not in CONCURRENCY_LIMITS:
+        _admission_metrics[scope]["allowed"] += 1
+
+def rate_limit(scope: str, per_admin: bool = False):
+    # Admin routes are limited per verified admin, public routes per client
+    # address; never on headers the client can vary freely
+    rate, burst = RATE_LIMITS[scope]
+    
+    if per_admin:
+        async def dependency(email: str = Depends(require_admin)):
+            _take_token(scope, rate, burst, f"admin:{email.lower()}")
+    else:
+        async def dependency(request: Request):
+            _take_token(scope, rate, burst, client_address(request))
+    
+    return dependency
+
+async def acquire_admission(scope: str):
+    semaphore = _semaphores[scope]
+    metrics = _admission_metrics[scope]
+    if semaphore.locked():
+        metrics["queued"] += 1
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=ADMISSION_QUEUE_SECONDS)
+    except asyncio.TimeoutError:
+        metrics["rejected"] += 1
+        raise HTTPException(
+            status_code=429,
+            detail="Server busy, try again shortly",
+            headers={"Retry-After": str(int(ADMISSION_QUEUE_SECONDS))}
+        )
+    metrics["allowed"] += 1
+    metrics["in_flight"] += 1
+
+def release_admission(scope: str):
+    _admission_metrics[scope]["in_flight"] -= 1
+    _semaphores[scope].release()
+
+def admission(scope: str):
+    # Yield-dependency teardown runs once the handler returns, before a
+    # StreamingResponse body is sent; routes that keep working while they
+    # stream hold their slot with acquire_admission/release_admission instead
+    async def dependency():
+        await acquire_admission(scope)
+        try:
+            yield
+        finally:
+            release_admission(scope)
+    
+    return dependency
+
+# Fields kept on response documents for internal use only
+RESPONSE_PROJECTION = {"_id": 0, "search_text": 0}
+
+def build_response_query(
+    branch: Optional[str] = None,
+    section: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> Dict[str, Any]:
+    query = {}
+    if branch:
+        query["branch"] = branch
+    if section:
+        query["section"] = section
+    if start_date or end_date:
+        query["submitted_at"] = {}
+        if start_date:
+            query["submitted_at"]["$gte"] = start_date
+        if end_date:
+            query["submitted_at"]["$lte"] = end_date
+    return query
+
+def extract_search_text(responses: Dict[str, Any]) -> str:
+    # Free-text "other" answers are submitted as qN_conditional
+    return " ".join(
+        value.strip() for key, value in responses.items()
+        if key.endswith("_conditional") and isinstance(value, str) and value.strip()
+    )
+
+async def backfill_search_text():
+    # One-off migration: responses stored before search_text existed get it
+    # once, then survey_meta records that so later boots skip the scan
+    # ($exists: false can't use an index)
+    if await db.survey_meta.find_one({"_id": "migrations", "search_text_backfilled": True}):
+        return
+    cursor = db.survey_responses.find(
+        {"search_text": {"$exists": False}}, {"_id": 1, "responses": 1}
+    )
+    updated = 0
+    batch = []
+    async for doc in cursor:
+        batch.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {"search_text": extract_search_text(doc.get("responses", {}))}}
+        ))
+        if len(batch) == 500:
+            await db.survey_responses.bulk_write(batch, ordered=False)
+            updated += len(batch)
+            batch = []
+    if batch:
+        await db.survey_responses.bulk_write(batch, ordered=False)
+        updated += len(batch)
+    if updated:
+        logging.info(f"Backfilled search_text on {updated} responses")
+    await db.survey_meta.update_one(
+        {"_id": "migrations"},
+        {"$set": {"search_text_backfilled": True}},
+        upsert=True
+    )
+
+# Question set versioning
+# Every change to survey_questions bumps a single counter so waves (and
+# anything cached off the question list) can tell which survey they saw.
+async def get_question_set_version() -> int:
+    meta = await db.survey_meta.find_one({"_id": "question_set"})
+    return meta.get("version", 0) if meta else 0
+
+async def bump_question_set_version(session=None) -> int:
+    meta = await db.survey_meta.find_one_and_update(
+        {"_id": "question_set"},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+    expire_question_cache()
+    return meta["version"]
+
+# The version itself is re-read at most every few seconds, so the submit
+# path (rollup triggers, decoder) doesn't pay a survey_meta read per request.
+# Changes made in this process expire it at once; other workers catch up
+# within the TTL.
+QUESTION_SET_TTL_SECONDS = float(os.environ.get('QUESTION_SET_TTL_SECONDS', '5'))
+
+_question_cache: Tuple[int, List[Dict[str, Any]]] = (-1, [])
+_question_cache_checked_at = float("-inf")
+
+def expire_question_cache():
+    global _question_cache_checked_at
+    _question_cache_checked_at = float("-inf")
+
+async def get_versioned_questions() -> Tuple[int, List[Dict[str, Any]]]:
+    # Shared list; callers must not mutate it
+    global _question_cache, _question_cache_checked_at
+    if time.monotonic() - _question_cache_checked_at <= QUESTION_SET_TTL_SECONDS:
+        return _question_cache
+    version = await get_question_set_version()
+    if _question_cache[0] != version:
+        questions = await db.survey_questions.find({}, {"_id": 0}).sort(
+            [("position", 1), ("question_number", 1)]
+        ).to_list(100)
+        _question_cache = (version, questions)
+    _question_cache_checked_at = time.monotonic()
+    return _question_cache
+
+async def get_questions() -> List[Dict[str, Any]]:
+    return (await get_versioned_questions())[1]
+
+# Answer keys
+# Responses store answers under q{question_number}, so a number is never
+# reused or moved to another question: reordering only changes position, and
+# new questions take numbers from a counter that also covers deleted ones.
+async def _raise_question_number_floor():
+    # Start the counter at the highest number in use; it did not always exist
+    highest = await db.survey_questions.find_one(
+        {}, {"_id": 0, "question_number": 1}, sort=[("question_number", -1)]
+    )
+    await db.survey_meta.update_one(
+        {"_id": "question_set"},
+        {"$max": {"last_question_number": highest["question_number"] if highest else 0}},
+        upsert=True
+    )
+
+async def reserve_question_numbers(count: int) -> List[int]:
+    if count == 0:
+        return []
+    await _raise_question_number_floor()
+    meta = await db.survey_meta.find_one_and_update(
+        {"_id": "question_set"},
+        {"$inc": {"last_question_number": count}},
+        return_document=ReturnDocument.AFTER
+    )
+    last = meta["last_question_number"]
+    return list(range(last - count + 1, last + 1))
+
+async def claim_question_number(requested: Optional[int]) -> int:
+    # Honour a requested number only if no question has ever used it
+    if requested and requested > 0:
+        await _raise_question_number_floor()
+        claimed = await db.survey_meta.find_one_and_update(
+            {"_id": "question_set", "last_question_number": {"$lt": requested}},
+            {"$set": {"last_question_number": requested}}
+        )
+        if claimed is not None:
+            return requested
+    return (await reserve_question_numbers(1))[0]
+
+async def backfill_question_positions():
+    # Questions stored before position existed are shown in number order
+    # (survey_questions holds a few dozen documents at most)
+    async for question in db.survey_questions.find({"position": {"$exists": False}}, {"_id": 1, "question_number": 1}):
+        await db.survey_questions.update_one(
+            {"_id": question["_id"]}, {"$set": {"position": question["question_number"]}}
+        )
+
+# Compact answer storage
+# With COMPACT_ANSWERS on, single-select answers are stored as option indexes
+# and multi-select answers as option bitmasks, tagged with the question-set
+# version whose option order they refer to. That version's options are kept
+# in survey_question_sets so old documents decode after questions change.
+COMPACT_ANSWERS = os.environ.get('COMPACT_ANSWERS', '').lower() in ('1', 'true', 'yes')
+
+class AnswerCodec:
+    __slots__ = ("version", "single", "multi")
+    
+    def __init__(self, version: int, questions: List[Dict[str, Any]]):
+        self.version = version
+        self.single: Dict[str, Tuple[List[str], Dict[str, int]]] = {}
+        self.multi: Dict[str, Tuple[List[str], Dict[str, int]]] = {}
+        for q in questions:
+            options = [o["value"] for o in q.get("options", [])]
+            table = (options, {value: index for index, value in enumerate(options)})
+            key = f"q{q['question_number']}"
+            if q["question_type"] == "single":
+                self.single[key] = table
+            elif q["question_type"] == "multi" and len(options) <= 63:
+                self.multi[key] = table
+    
+    def encode_value(self, key: str, value: Any) -> Any:
+        # Anything that isn't a plain option (free text, unknown values)
+        # is stored as submitted
+        if key in self.single and isinstance(value, str) and value in self.single[key][1]:
+            return self.single[key][1][value]
+        if key in self.multi and isinstance(value, list):
+            indexes = self.multi[key][1]
+            if value and all(isinstance(v, str) and v in indexes for v in value):
+                mask = 0
+                for v in value:
+                    mask |= 1 << indexes[v]
+                return mask
+        if (key in self.single or key in self.multi) and isinstance(value, int) and not isinstance(value, bool):
+            # A raw number here would read back as an option index or bitmask
+            return str(value)
+        return value
+    
+    def decode_value(self, key: str, value: Any) -> Any:
+        if not isinstance(value, int) or isinstance(value, bool):
+            return value
+        if key in self.single:
+            options = self.single[key][0]
+            return options[value] if 0 <= value < len(options) else value
+        if key in self.multi:
+            return [option for index, option in enumerate(self.multi[key][0]) if value >> index & 1]
+        return value
+    
+    def decode(self, responses: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: self.decode_value(key, value) for key, value in responses.items()}
+
+_answer_codecs: Dict[int, AnswerCodec] = {}
+
+async def get_current_codec() -> AnswerCodec:
+    version, questions = await get_versioned_questions()
+    codec = _answer_codecs.get(version)
+    if codec is None:
+        snapshot = [{
+            "question_number": q["question_number"],
+            "question_type": q["question_type"],
+            "options": [{"value": o["value"]} for o in q.get("options", [])]
+        } for q in questions]
+        # Another worker may have stored this version first, from questions
+        # it read at a different moment; encode with whatever was stored
+        try:
+            stored = await db.survey_question_sets.find_one_and_update(
+                {"version": version},
+                {"$setOnInsert": {"version": version, "questions": snapshot}},
+                projection={"_id": 0},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            stored = await db.survey_question_sets.find_one({"version": version}, {"_id": 0})
+        codec = _answer_codecs[version] = AnswerCodec(version, stored["questions"])
+    return codec
+
+async def get_codec(version: int) -> Optional[AnswerCodec]:
+    codec = _answer_codecs.get(version)
+    if codec is None:
+        question_set = await db.survey_question_sets.find_one({"version": version}, {"_id": 0})
+        if question_set is None:
+            return None
+        codec = _answer_codecs[version] = AnswerCodec(version, question_set["questions"])
+    return codec
+
+async def decode_responses(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Decodes compact documents in place back to option labels
+    for doc in docs:
+        version = doc.pop("answer_version", None)
+        if version is not None:
+            codec = await get_codec(version)
+            if codec is not None:
+                doc["responses"] = codec.decode(doc.get("responses", {}))
+    return docs
+
+# Submission decoding
+# The submit path parses the raw body once and splits it straight into the
+# stored document: base fields are type-checked like SurveySubmission, the
+# remaining keys become responses without a copy, and search text and the
+# compact encoding are produced in the same pass. Answers are not validated
+# against the question schema (the endpoint never did); the schema only
+# matters for compact encoding, so that is the only case that needs a
+# per-version decoder.
+SUBMISSION_BASE_FIELDS = ("branch", "section", "wd_destination", "dms_id_name")
+
+class SubmissionDecoder:
+    __slots__ = ("codec",)
+    
+    def __init__(self, codec: Optional[AnswerCodec] = None):
+        self.codec = codec
+    
+    def decode(self, body: bytes) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        # Returns the document (stored responses, search text, answer
+        # version) and the plain responses for rollups
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", 0), "msg": "JSON decode error", "input": {}, "ctx": {"error": str(e)}}],
+                body=body
+            )
+        if not isinstance(payload, dict):
+            raise RequestValidationError(
+                [{"type": "model_attributes_type", "loc": ("body",), "msg": "Input should be a valid dictionary or object to extract fields from", "input": payload}],
+                body=payload
+            )
+        
+        doc = {}
+        errors = []
+        for field in SUBMISSION_BASE_FIELDS:
+            if field not in payload:
+                errors.append({"type": "missing", "loc": ("body", field), "msg": "Field required", "input": payload})
+            elif not isinstance(payload[field], str):
+                errors.append({"type": "string_type", "loc": ("body", field), "msg": "Input should be a valid string", "input": payload[field]})
+        if errors:
+            raise RequestValidationError(errors, body=payload)
+        for field in SUBMISSION_BASE_FIELDS:
+            doc[field] = payload.pop(field)
+        
+        # Everything left is a question answer, exactly as submitted
+        responses = payload
+        search_parts = []
+        codec = self.codec
+        stored = {} if codec is not None else responses
+        for key, value in responses.items():
+            if key.endswith("_conditional"):
+                # Free-text "other" answers are submitted as qN_conditional
+                if isinstance(value, str) and value.strip():
+                    search_parts.append(value.strip())
+                if codec is not None:
+                    stored[key] = value
+            elif codec is not None:
+                stored[key] = codec.encode_value(key, value)
+        
+        doc["responses"] = stored
+        doc["search_text"] = " ".join(search_parts)
+        if codec is not None:
+            doc["answer_version"] = codec.version
+        return doc, responses
+
+_plain_submission_decoder = SubmissionDecoder()
+_submission_decoders: Dict[int, SubmissionDecoder] = {}
+
+async def get_submission_decoder() -> SubmissionDecoder:
+    if not COMPACT_ANSWERS:
+        return _plain_submission_decoder
+    # The version comes from the TTL-cached question set, not a Mongo read
+    version, _ = await get_versioned_questions()
+    decoder = _submission_decoders.get(version)
+    if decoder is None:
+        codec = await get_current_codec()
+        _submission_decoders.clear()
+        decoder = _submission_decoders[codec.version] = SubmissionDecoder(codec)
+    return decoder
+
+async def apply_question_set(operations: list) -> int:
+    # One transaction for the writes and the version bump, so readers keyed
+    # on the version never see a half-applied set
+    try:
+        async with await client.start_session() as session:
+            async with session.start_transaction():
+                await db.survey_questions.bulk_write(operations, ordered=True, session=session)
+                version = await bump_question_set_version(session=session)
+        # Expire again now the transaction is committed and visible
+        expire_question_cache()
+        return version
+    except OperationFailure as e:
+        if e.code != 20:  # IllegalOperation: standalone server without transactions
+            raise
+        logging.warning("Transactions unavailable, applying question set without one")
+    await db.survey_questions.bulk_write(operations, ordered=True)
+    return await bump_question_set_version()
+
+# Survey waves
+# Responses are tagged with the wave that was open when they were submitted
+# and admin queries default to that wave, so hot reads never touch history.
+# Other workers only see a wave opened or closed here once their cached copy
+# expires, so keep the TTL short.
+ACTIVE_WAVE_TTL_SECONDS = int(os.environ.get('ACTIVE_WAVE_TTL_SECONDS', '15'))
+
+_active_wave: Optional[Dict[str, Any]] = None
+_active_wave_loaded_at = float("-inf")
+
+async def get_active_wave() -> Optional[Dict[str, Any]]:
+    global _active_wave, _active_wave_loaded_at
+    if time.monotonic() - _active_wave_loaded_at > ACTIVE_WAVE_TTL_SECONDS:
+        _active_wave = await db.survey_waves.find_one(
+            {"status": "open"}, {"_id": 0, "questions": 0}
+        )
+        _active_wave_loaded_at = time.monotonic()
+    return _active_wave
+
+def reset_active_wave():
+    global _active_wave_loaded_at
+    _active_wave_loaded_at = float("-inf")
+
+async def resolve_wave_query(wave: Optional[str]) -> Dict[str, Any]:
+    # wave=None -> active wave (if any), wave="all" -> every wave
+    if wave == "all":
+        return {}
+    if wave:
+        return {"wave_id": wave}
+    active = await get_active_wave()
+    return {"wave_id": active["id"]} if active else {}
+
+async def compute_wave_summary(wave_id: str) -> Dict[str, Any]:
+    result = (await db.survey_responses.aggregate([
+        {"$match": {"wave_id": wave_id}},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "by_branch": [
+                {"$group": {"_id": "$branch", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ],
+            "by_section": [
+                {"$group": {"_id": "$section", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ],
+            "outlets": [
+                {"$group": {"_id": "$dms_id_name"}},
+                {"$count": "count"}
+            ]
+        }}
+    ]).to_list(1))[0]
+    return {
+        "total_responses": result["total"][0]["count"] if result["total"] else 0,
+        "responses_by_branch": [{"branch": item["_id"], "count": item["count"]} for item in result["by_branch"]],
+        "responses_by_section": [{"section": item["_id"], "count": item["count"]} for item in result["by_section"]],
+        "recent_responses": 0,
+        "completed_outlets": result["outlets"][0]["count"] if result["outlets"] else 0
+    }
+
+async def close_wave(wave_id: str) -> Optional[Dict[str, Any]]:
+    # The summary is left for get_wave_summary: other workers keep tagging
+    # submissions with this wave until their cached copy expires
+    wave = await db.survey_waves.find_one_and_update(
+        {"id": wave_id, "status": "open"},
+        {"$set": {"status": "closed", "closed_at": datetime.now(timezone.utc).isoformat()}},
+        projection={"_id": 0, "questions": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    reset_active_wave()
+    return wave
+
+def wave_settled(wave: Dict[str, Any]) -> bool:
+    # True once no worker can still be tagging submissions with the wave,
+    # allowing a minute on top of the cache TTL for requests in flight
+    if not wave.get("closed_at"):
+        return False
+    closed_at = datetime.fromisoformat(wave["closed_at"])
+    return datetime.now(timezone.utc) - closed_at > timedelta(seconds=ACTIVE_WAVE_TTL_SECONDS + 60)
+
+async def get_wave_summary(wave_id: str) -> Optional[Dict[str, Any]]:
+    # Summaries of closed waves are computed once the wave has settled and
+    # stored; until then callers compute live figures
+    wave = await db.survey_waves.find_one(
+        {"id": wave_id, "status": "closed"}, {"_id": 0, "summary": 1, "closed_at": 1}
+    )
+    if not wave:
+        return None
+    if wave.get("summary"):
+        return wave["summary"]
+    if not wave_settled(wave):
+        return None
+    summary = await compute_wave_summary(wave_id)
+    await db.survey_waves.update_one({"id": wave_id, "summary": None}, {"$set": {"summary": summary}})
+    return summary
+
+async def get_wave_outlets(wave_query: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+    # Outlets a wave is measured against: the snapshot taken when it opened,
+    # or the live outlet master when there is no wave (or no snapshot)
+    if wave_query:
+        active = await get_active_wave()
+        if active and active["id"] == wave_query["wave_id"]:
+            wave = active
+        else:
+            wave = await db.survey_waves.find_one(
+                {"id": wave_query["wave_id"]}, {"_id": 0, "outlet_snapshot": 1}
+            )
+        if wave and wave.get("outlet_snapshot"):
+            return db.survey_wave_outlets, {"wave_id": wave_query["wave_id"]}
+    return db.survey_data, {}
+
+# Archived waves
+# archive_wave.py moves a closed wave's responses into an Arrow IPC file;
+# reads for that wave are then served from the memory-mapped file instead of
+# Mongo. Mapped tables cost address space rather than RAM, but keep only a
+# few open.
+ARCHIVE_TABLE_CACHE_SIZE = int(os.environ.get('ARCHIVE_TABLE_CACHE_SIZE', '4'))
+
+_archive_tables: "OrderedDict[str, Any]" = OrderedDict()
+
+async def get_archived_wave(wave_query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if not wave_query:
+        return None
+    return await db.survey_waves.find_one(
+        {"id": wave_query["wave_id"], "archived": True},
+        {"_id": 0, "archive_path": 1, "questions": 1}
+    )
+
+def load_archive_table(path: str):
+    table = _archive_tables.get(path)
+    if table is None:
+        import pyarrow as pa
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        _archive_tables[path] = table
+        if len(_archive_tables) > ARCHIVE_TABLE_CACHE_SIZE:
+            _archive_tables.popitem(last=False)
+    else:
+        _archive_tables.move_to_end(path)
+    return table
+
+def read_archived_responses(
+    path: str,
+    branch: Optional[str] = None,
+    section: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    import pyarrow.compute as pc
+    table = load_archive_table(path)
+    
+    conditions = []
+    if branch:
+        conditions.append(pc.equal(table["branch"], branch))
+    if section:
+        conditions.append(pc.equal(table["section"], section))
+    if start_date:
+        conditions.append(pc.greater_equal(table["submitted_at"], start_date))
+    if end_date:
+        conditions.append(pc.less_equal(table["submitted_at"], end_date))
+    if conditions:
+        mask = conditions[0]
+        for condition in conditions[1:]:
+            mask = pc.and_(mask, condition)
+        table = table.filter(mask)
+    
+    table = table.sort_by([("submitted_at", "descending")])
+    if limit:
+        table = table.slice(0, limit)
+    
+    rows = table.drop_columns(["search_text"]).to_pylist()
+    for row in rows:
+        row["responses"] = json.loads(row["responses"])
+    return rows
+
+# Cross-tab report cache
+# Results are keyed by (question, dimension, filters, wave, question-set
+# version) and dropped as soon as a submission lands inside their slice.
+# That only sees submissions made on this worker, so entries also expire
+# after a short TTL to pick up the others.
+CROSSTAB_DIMENSIONS = {"branch", "section", "wd_destination"}
+CROSSTAB_CACHE_SIZE = 256
+CROSSTAB_CACHE_TTL_SECONDS = int(os.environ.get('CROSSTAB_CACHE_TTL_SECONDS', '30'))
+QUESTION_KEY_PATTERN = re.compile(r"^q\d+$")
+
+_crosstab_cache: "OrderedDict[tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+def _slice_matches(key: tuple, doc: Dict[str, Any]) -> bool:
+    _, _, branch, section, start_date, end_date, wave_id, _ = key
+    return (
+        (branch is None or branch == doc["branch"])
+        and (section is None or section == doc["section"])
+        and (wave_id == "all" or wave_id == doc.get("wave_id"))
+        and (start_date is None or doc["submitted_at"] >= start_date)
+        and (end_date is None or doc["submitted_at"] <= end_date)
+    )
+
+def invalidate_crosstab_cache(doc: Dict[str, Any]):
+    for key in [key for key in _crosstab_cache if _slice_matches(key, doc)]:
+        del _crosstab_cache[key]
+
+# Daily rollups
+# response_rollups holds one small document per (day, branch, section) with
+# a response count and per-question option tallies, kept current with $inc
+# on every submission so trend charts never scan survey_responses.
+def encode_rollup_key(value: str) -> str:
+    # Option labels like "Rs.20k-1L" can't be used verbatim as field names
+    return value.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+def decode_rollup_key(key: str) -> str:
+    return unquote(key)
+
+_conditional_triggers: Tuple[int, Dict[str, str]] = (-1, {})
+
+async def get_conditional_triggers() -> Dict[str, str]:
+    global _conditional_triggers
+    version, questions = await get_versioned_questions()
+    if _conditional_triggers[0] != version:
+        _conditional_triggers = (
+            version,
+            {f"q{q['question_number']}": q["conditional_trigger"] for q in questions if q.get("conditional_trigger")}
+        )
+    return _conditional_triggers[1]
+
+def rollup_answers(responses: Dict[str, Any], triggers: Dict[str, str]):
+    # Yields (question, option) for every chosen option; free-text details
+    # appended as "Trigger: detail" are tallied under the trigger itself
+    for key, value in responses.items():
+        if not QUESTION_KEY_PATTERN.match(key) or value in (None, ""):
+            continue
+        trigger = triggers.get(key)
+        for option in value if isinstance(value, list) else [value]:
+            option = str(option)
+            if trigger and option.startswith(f"{trigger}:"):
+                option = trigger
+            yield key, option
+
+async def update_rollup(doc: Dict[str, Any], responses: Dict[str, Any]):
+    # responses are the submitted labels, before any compact encoding
+    try:
+        increments = {"count": 1}
+        for key, option in rollup_answers(responses, await get_conditional_triggers()):
+            field = f"answers.{key}.{encode_rollup_key(option)}"
+            increments[field] = increments.get(field, 0) + 1
+        await db.response_rollups.update_one(
+            {"day": doc["submitted_at"][:10], "branch": doc["branch"], "section": doc["section"]},
+            {"$inc": increments},
+            upsert=True
+        )
+    except Exception as e:
+        # The response itself is stored; a rebuild will recover the rollup
+        logging.error(f"Error updating rollup for {doc['id']}: {e}")
+
+async def rebuild_rollups() -> int:
+    # Only days before today (UTC) are rebuilt. Submissions are stamped with
+    # the server time, so closed days get no new $inc while the scan runs and
+    # each day's document can be replaced in place. Today's rollups keep
+    # their live $inc tallies and are rebuilt by the next run after midnight.
+    cutoff = datetime.now(timezone.utc).date().isoformat()
+    triggers = await get_conditional_triggers()
+    rollups: Dict[tuple, Dict[str, Any]] = {}
+    
+    def tally(doc: Dict[str, Any]):
+        key = (doc["submitted_at"][:10], doc["branch"], doc["section"])
+        rollup = rollups.setdefault(key, {
+            "day": key[0], "branch": key[1], "section": key[2], "count": 0, "answers": {}
+        })
+        rollup["count"] += 1
+        for question, option in rollup_answers(doc.get("responses", {}), triggers):
+            tallies = rollup["answers"].setdefault(question, {})
+            option = encode_rollup_key(option)
+            tallies[option] = tallies.get(option, 0) + 1
+    
+    # Archived waves no longer live in survey_responses; read them back from
+    # their Arrow files so their days are rebuilt rather than deleted. An
+    # unreadable archive fails the rebuild before anything is written.
+    archived_ids = set()
+    async for wave in db.survey_waves.find({"archived": True}, {"_id": 0, "id": 1, "archive_path": 1}):
+        try:
+            rows = await asyncio.to_thread(read_archived_responses, wave["archive_path"])
+        except Exception as e:
+            raise RuntimeError(f"Archive for wave {wave['id']} could not be read: {e}")
+        await decode_responses(rows)
+        for row in rows:
+            archived_ids.add(row["id"])
+            if row["submitted_at"] < cutoff:
+                tally(row)
+    
+    cursor = db.survey_responses.find(
+        {"submitted_at": {"$lt": cutoff}},
+        {"_id": 0, "id": 1, "submitted_at": 1, "branch": 1, "section": 1, "responses": 1, "answer_version": 1}
+    ).batch_size(5000)
+    async for doc in cursor:
+        # Still in Mongo while archive_wave.py is removing it
+        if doc.get("id") in archived_ids:
+            continue
+        await decode_responses([doc])
+        tally(doc)
+    
+    # Replace each closed day's document individually, so trend reads never
+    # see a half-built table, then drop closed-day documents with no responses
+    operations = [
+        ReplaceOne({"day": key[0], "branch": key[1], "section": key[2]}, rollup, upsert=True)
+        for key, rollup in rollups.items()
+    ]
+    async for doc in db.response_rollups.find({"day": {"$lt": cutoff}}, {"day": 1, "branch": 1, "section": 1}):
+        if (doc["day"], doc["branch"], doc["section"]) not in rollups:
+            operations.append(DeleteOne({"_id": doc["_id"]}))
+    for start in range(0, len(operations), 1000):
+        await db.response_rollups.bulk_write(operations[start:start + 1000], ordered=False)
+    return len(rollups)
+
+# Outlet worklists
+# The active wave's outlets (its snapshot, or the outlet master when no wave
+# is open) are cached as section -> WD destination -> outlets, and its
+# surveyed outlets as section -> set, updated on each submit. Both refresh on
+# a timer so changes from other workers or reloads show up.
+OUTLET_INDEX_TTL_SECONDS = int(os.environ.get('OUTLET_INDEX_TTL_SECONDS', '600'))
+COMPLETED_OUTLETS_TTL_SECONDS = int(os.environ.get('COMPLETED_OUTLETS_TTL_SECONDS', '60'))
+
+_outlet_index: Dict[str, Dict[str, List[str]]] = {}
+_outlet_index_wave: Optional[str] = None
+_outlet_index_loaded_at = float("-inf")
+_outlet_index_lock = asyncio.Lock()
+_completed_outlets: Dict[str, set] = {}
+_completed_outlets_wave: Optional[str] = None
+_completed_outlets_loaded_at = float("-inf")
+_completed_outlets_lock = asyncio.Lock()
+
+async def get_outlet_index() -> Dict[str, Dict[str, List[str]]]:
+    global _outlet_index, _outlet_index_wave, _outlet_index_loaded_at
+    wave_query = await resolve_wave_query(None)
+    wave_id = wave_query.get("wave_id")
+    
+    def stale():
+        return (
+            _outlet_index_wave != wave_id
+            or time.monotonic() - _outlet_index_loaded_at > OUTLET_INDEX_TTL_SECONDS
+        )
+    
+    if stale():
+        async with _outlet_index_lock:
+            if stale():
+                outlets, outlet_match = await get_wave_outlets(wave_query)
+                index: Dict[str, Dict[str, List[str]]] = {}
+                async for outlet in outlets.find(
+                    outlet_match, {"_id": 0, "section": 1, "wd_destination": 1, "dms_id_name": 1}
+                ).sort("dms_id_name", 1):
+                    index.setdefault(outlet["section"], {}).setdefault(
+                        outlet["wd_destination"], []
+                    ).append(outlet["dms_id_name"])
+                _outlet_index = index
+                _outlet_index_wave = wave_id
+                _outlet_index_loaded_at = time.monotonic()
+    return _outlet_index
+
+async def get_completed_outlets() -> Dict[str, set]:
+    global _completed_outlets, _completed_outlets_wave, _completed_outlets_loaded_at
+    wave_query = await resolve_wave_query(None)
+    wave_id = wave_query.get("wave_id")
+    
+    def stale():
+        return (
+            _completed_outlets_wave != wave_id
+            or time.monotonic() - _completed_outlets_loaded_at > COMPLETED_OUTLETS_TTL_SECONDS
+        )
+    
+    if stale():
+        async with _completed_outlets_lock:
+            if stale():
+                groups = await db.survey_responses.aggregate([
+                    {"$match": wave_query},
+                    {"$group": {"_id": "$section", "outlets": {"$addToSet": "$dms_id_name"}}}
+                ]).to_list(None)
+                _completed_outlets = {group["_id"]: set(group["outlets"]) for group in groups}
+                _completed_outlets_wave = wave_id
+                _completed_outlets_loaded_at = time.monotonic()
+    return _completed_outlets
+
+def record_completed_outlet(doc: Dict[str, Any]):
+    if _completed_outlets_loaded_at > float("-inf") and doc.get("wave_id") == _completed_outlets_wave:
+        _completed_outlets.setdefault(doc["section"], set()).add(doc["dms_id_name"])
 
 # Initialize survey data collection
-@api_router.on_event("startup")
 async def initialize_data():
     # Create indexes for faster queries
     await db.survey_responses.create_index("branch")
     await db.survey_responses.create_index("section_code")
     await db.survey_responses.create_index("submitted_at")
+    await db.survey_responses.create_index([("search_text", "text")], default_language="none")
+    await db.survey_responses.create_index([("wave_id", 1), ("branch", 1)])
+    await db.survey_responses.create_index([("wave_id", 1), ("section", 1)])
+    await db.survey_responses.create_index([("wave_id", 1), ("submitted_at", -1)])
+    await db.survey_waves.create_index("id", unique=True)
+    # At most one wave is open; this replaces the old plain status index
+    if "status_1" in await db.survey_waves.index_information():
+        await db.survey_waves.drop_index("status_1")
+    await db.survey_waves.create_index(
+        "status", name="one_open_wave", unique=True, partialFilterExpression={"status": "open"}
+    )
+    await db.survey_wave_outlets.create_index([("wave_id", 1), ("section", 1)])
+    await db.survey_wave_outlets.create_index([("wave_id", 1), ("branch", 1)])
+    await db.response_rollups.create_index([("day", 1), ("branch", 1), ("section", 1)], unique=True)
+    await db.survey_question_sets.create_index("version", unique=True)
+    await db.survey_data.create_index([("branch", 1), ("section", 1), ("wd_destination", 1)])
+    await backfill_search_text()
+    await backfill_question_positions()
+
+async def warm_caches():
+    # Fill the in-process caches before the instance reports ready, so the
+    # first field requests after a deploy don't pay for cold loads
+    await asyncio.gather(
+        get_questions(),
+        get_outlet_index(),
+        get_completed_outlets(),
+        get_active_wave()
+    )
 
 @api_router.get("/")
 async def root():
     return {"message": "ITC Survey API"}
 
+# Health probes: live once the process serves requests, ready once Mongo is
+# connected and caches are warm
+@api_router.get("/health/live")
+async def health_live():
+    return {"status": "ok"}
+
+@api_router.get("/health/ready")
+async def health_ready(request: Request):
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"status": "ready"}
+
 # Get unique branches
 @api_router.get("/branches")
 async def get_branches():
@@ -151,13 +1193,16 @@ async def get_dms_ids(section: str, wd_destination: str):
 @api_router.get("/section-completion/{section}")
 async def get_section_completion(section: str):
     try:
-        # Get total DMS IDs in this section
-        total_dms_ids = await db.survey_data.count_documents({"section": section})
+        wave_query = await resolve_wave_query(None)
+        
+        # Get total DMS IDs in this section, as of the wave's outlet snapshot
+        outlets, outlet_match = await get_wave_outlets(wave_query)
+        total_dms_ids = await outlets.count_documents({**outlet_match, "section": section})
         
         # Get unique DMS IDs that have completed surveys in this section
         completed_surveys = await db.survey_responses.distinct(
             "dms_id_name", 
-            {"section": section}
+            {"section": section, **wave_query}
         )
         completed_count = len(completed_surveys)
         
@@ -174,31 +1219,61 @@ async def get_section_completion(section: str):
         logging.error(f"Error fetching section completion: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Submit survey
-@api_router.post("/survey/submit")
-async def submit_survey(submission: SurveySubmission):
+# Outlets in a section (optionally one WD destination) not yet surveyed this wave
+@api_router.get("/worklist/{section}")
+async def get_worklist(section: str, wd_destination: Optional[str] = None):
     try:
-        # Extract base fields
-        doc = {
-            "id": str(uuid.uuid4()),
-            "branch": submission.branch,
-            "section": submission.section,
-            "wd_destination": submission.wd_destination,
-            "dms_id_name": submission.dms_id_name,
-            "submitted_at": datetime.now(timezone.utc).isoformat()
-        }
+        outlets_by_wd = (await get_outlet_index()).get(section, {})
+        completed = (await get_completed_outlets()).get(section, set())
+        
+        if wd_destination is not None:
+            outlets_by_wd = {wd_destination: outlets_by_wd.get(wd_destination, [])}
         
-        # Get all extra fields (dynamic question responses)
-        extra_data = submission.model_dump(exclude={"branch", "section", "wd_destination", "dms_id_name"})
+        worklist = []
+        total = 0
+        for wd, outlets in sorted(outlets_by_wd.items()):
+            pending = [name for name in outlets if name not in completed]
+            total += len(outlets)
+            if pending:
+                worklist.append({"wd_destination": wd, "pending": pending})
         
-        # Store responses in a structured format
-        responses = {}
-        for key, value in extra_data.items():
-            responses[key] = value
+        pending_count = sum(len(group["pending"]) for group in worklist)
+        return {
+            "section": section,
+            "wd_destination": wd_destination,
+            "total_dms_ids": total,
+            "pending_count": pending_count,
+            "worklist": worklist
+        }
+    except Exception as e:
+        logging.error(f"Error fetching worklist: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Submit survey
+@api_router.post(
+    "/survey/submit",
+    dependencies=[Depends(rate_limit("submit"))],
+    # The body is decoded by hand; keep the documented request shape
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": SurveySubmission.model_json_schema()}}
+    }}
+)
+async def submit_survey(request: Request):
+    decoder = await get_submission_decoder()
+    doc, responses = decoder.decode(await request.body())
+    try:
+        doc["id"] = str(uuid.uuid4())
+        doc["submitted_at"] = datetime.now(timezone.utc).isoformat()
         
-        doc["responses"] = responses
+        active_wave = await get_active_wave()
+        if active_wave:
+            doc["wave_id"] = active_wave["id"]
         
         await db.survey_responses.insert_one(doc)
+        invalidate_crosstab_cache(doc)
+        await update_rollup(doc, responses)
+        record_completed_outlet(doc)
         return {"success": True, "message": "Survey submitted successfully", "id": doc["id"]}
     except Exception as e:
         logging.error(f"Error submitting survey: {e}")
@@ -207,57 +1282,127 @@ async def submit_survey(submission: SurveySubmission):
 # Admin login
 @api_router.post("/admin/login")
 async def admin_login(credentials: AdminLogin):
-    if verify_admin(credentials.email, credentials.password):
-        # Simple token (in production, use JWT)
-        token = f"admin_token_{uuid.uuid4()}"
-        return AdminResponse(token=token, email=credentials.email)
+    if await verify_admin(credentials.email, credentials.password):
+        token, expires = issue_admin_token(credentials.email)
+        return AdminResponse(
+            token=token,
+            email=credentials.email,
+            expires_at=datetime.fromtimestamp(expires, timezone.utc).isoformat()
+        )
     else:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
 # Get all survey responses with filters
-@api_router.get("/admin/responses")
+@admin_router.get("/responses", dependencies=[Depends(admission("responses"))])
 async def get_responses(
     branch: Optional[str] = None,
     section: Optional[str] = None,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    wave: Optional[str] = None
 ):
     try:
-        query = {}
-        if branch:
-            query["branch"] = branch
-        if section:
-            query["section"] = section
-        if start_date or end_date:
-            query["submitted_at"] = {}
-            if start_date:
-                query["submitted_at"]["$gte"] = start_date
-            if end_date:
-                query["submitted_at"]["$lte"] = end_date
-        
-        responses = await db.survey_responses.find(query, {"_id": 0}).sort("submitted_at", -1).to_list(1000)
+        wave_query = await resolve_wave_query(wave)
+        archived = await get_archived_wave(wave_query)
+        if archived:
+            responses = await asyncio.to_thread(
+                read_archived_responses, archived["archive_path"],
+                branch, section, start_date, end_date, 1000
+            )
+            await decode_responses(responses)
+            return {"responses": responses, "total": len(responses)}
+        
+        query = build_response_query(branch, section, start_date, end_date)
+        query.update(wave_query)
+        
+        responses = await db.survey_responses.find(query, RESPONSE_PROJECTION).sort("submitted_at", -1).to_list(1000)
+        await decode_responses(responses)
         return {"responses": responses, "total": len(responses)}
     except Exception as e:
         logging.error(f"Error fetching responses: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Full-text search over free-text answers with facet counts
+@admin_router.get("/responses/search", dependencies=[Depends(admission("responses"))])
+async def search_responses(
+    q: str,
+    branch: Optional[str] = None,
+    section: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    wave: Optional[str] = None,
+    limit: int = 50
+):
+    try:
+        query = build_response_query(branch, section, start_date, end_date)
+        query.update(await resolve_wave_query(wave))
+        query["$text"] = {"$search": q}
+        
+        def facet(field):
+            return [
+                {"$group": {"_id": field, "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ]
+        
+        pipeline = [
+            {"$match": query},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            {"$facet": {
+                "results": [
+                    {"$sort": {"score": -1, "submitted_at": -1}},
+                    {"$limit": min(max(limit, 1), 500)},
+                    {"$project": RESPONSE_PROJECTION}
+                ],
+                "total": [{"$count": "count"}],
+                "by_branch": facet("$branch"),
+                "by_section": facet("$section"),
+                "by_date": facet({"$substrCP": ["$submitted_at", 0, 10]})
+            }}
+        ]
+        result = (await db.survey_responses.aggregate(pipeline).to_list(1))[0]
+        
+        def counts(key, name):
+            return [{name: item["_id"], "count": item["count"]} for item in result[key]]
+        
+        return {
+            "query": q,
+            "responses": await decode_responses(result["results"]),
+            "total": result["total"][0]["count"] if result["total"] else 0,
+            "facets": {
+                "branch": counts("by_branch", "branch"),
+                "section": counts("by_section", "section"),
+                "date": sorted(counts("by_date", "date"), key=lambda item: item["date"])
+            }
+        }
+    except Exception as e:
+        logging.error(f"Error searching responses: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Get statistics
-@api_router.get("/admin/stats")
-async def get_stats():
+@admin_router.get("/stats", dependencies=[Depends(admission("stats"))])
+async def get_stats(wave: Optional[str] = None):
     try:
-        total = await db.survey_responses.count_documents({})
+        wave_query = await resolve_wave_query(wave)
+        if wave_query:
+            # Settled closed waves are served from their stored summary
+            summary = await get_wave_summary(wave_query["wave_id"])
+            if summary:
+                return summary
+        
+        total = await db.survey_responses.count_documents(wave_query)
         
         # Responses by branch
         by_branch = await db.survey_responses.aggregate([
+            {"$match": wave_query},
             {"$group": {"_id": "$branch", "count": {"$sum": 1}}},
             {"$sort": {"count": -1}}
         ]).to_list(100)
         
         # Recent responses count (last 7 days)
-        from datetime import timedelta
         week_ago = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
         recent = await db.survey_responses.count_documents({
-            "submitted_at": {"$gte": week_ago}
+            "submitted_at": {"$gte": week_ago},
+            **wave_query
         })
         
         return {
@@ -272,94 +1417,785 @@ async def get_stats():
         logging.error(f"Error fetching stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Live dashboard stream
+# A single watcher task (change stream, or tailing by submitted_at when the
+# server is not a replica set) fans new submissions out to every connected
+# admin, so open dashboards receive small deltas instead of re-polling.
+STREAM_QUEUE_SIZE = 100
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_POLL_SECONDS = 2
+STREAM_RESTART_SECONDS = 5
+
+_stream_subscribers: set = set()
+_stream_task: Optional[asyncio.Task] = None
+_stream_counters: Dict[str, Any] = {}
+
+def _format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _summarize_submission(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": doc.get("id"),
+        "branch": doc.get("branch"),
+        "section": doc.get("section"),
+        "wd_destination": doc.get("wd_destination"),
+        "dms_id_name": doc.get("dms_id_name"),
+        "responses": doc.get("responses", {}),
+        "submitted_at": doc.get("submitted_at"),
+    }
+
+def _counters_payload() -> Dict[str, Any]:
+    by_branch = sorted(_stream_counters["by_branch"].items(), key=lambda item: -item[1])
+    return {
+        "total_responses": _stream_counters["total"],
+        "responses_by_branch": [{"branch": branch, "count": count} for branch, count in by_branch],
+        "recent_responses": _stream_counters["recent"],
+    }
+
+async def _load_stream_counters():
+    wave_query = await resolve_wave_query(None)
+    by_branch = await db.survey_responses.aggregate([
+        {"$match": wave_query},
+        {"$group": {"_id": "$branch", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    week_ago = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
+    _stream_counters["wave_id"] = wave_query.get("wave_id")
+    _stream_counters["total"] = sum(item["count"] for item in by_branch)
+    _stream_counters["by_branch"] = {item["_id"]: item["count"] for item in by_branch}
+    # "recent" only grows while the stream is open; clients resync on reconnect
+    _stream_counters["recent"] = await db.survey_responses.count_documents({
+        "submitted_at": {"$gte": week_ago},
+        **wave_query
+    })
+
+def _publish(event: str, data: Any):
+    for queue in list(_stream_subscribers):
+        if queue.full():
+            # Slow consumer: drop its backlog and ask it to refetch instead
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(("resync", {}))
+            continue
+        queue.put_nowait((event, data))
+
+async def _apply_submission(doc: Dict[str, Any]):
+    # The active wave can change on another worker; follow it through the
+    # TTL cache and recount (the recount already includes this document)
+    active = await get_active_wave()
+    if (active["id"] if active else None) != _stream_counters["wave_id"]:
+        await _load_stream_counters()
+        _publish("resync", {})
+        return
+    if _stream_counters["wave_id"] and doc.get("wave_id") != _stream_counters["wave_id"]:
+        return
+    branch = doc.get("branch")
+    _stream_counters["total"] += 1
+    _stream_counters["recent"] += 1
+    _stream_counters["by_branch"][branch] = _stream_counters["by_branch"].get(branch, 0) + 1
+    _publish("submission", _summarize_submission(doc))
+    _publish("stats", _counters_payload())
+
+async def _tail_responses():
+    last_seen = datetime.now(timezone.utc).isoformat()
+    while True:
+        await asyncio.sleep(STREAM_POLL_SECONDS)
+        docs = await db.survey_responses.find(
+            {"submitted_at": {"$gt": last_seen}}, {"_id": 0}
+        ).sort("submitted_at", 1).to_list(STREAM_QUEUE_SIZE)
+        for doc in await decode_responses(docs):
+            await _apply_submission(doc)
+            last_seen = doc["submitted_at"]
+
+async def _watch_responses():
+    # Restarts after errors (a Mongo blip, a dropped change stream) so
+    # connected dashboards keep getting updates; each restart recounts and
+    # tells clients to refetch what they may have missed
+    while True:
+        try:
+            await _load_stream_counters()
+            try:
+                async with db.survey_responses.watch(
+                    [{"$match": {"operationType": "insert"}}]
+                ) as change_stream:
+                    async for change in change_stream:
+                        await _apply_submission((await decode_responses([change["fullDocument"]]))[0])
+            except OperationFailure as e:
+                if e.code != 40573:  # change streams need a replica set
+                    raise
+                logging.info("Change stream unavailable, tailing survey_responses")
+                await _tail_responses()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Response stream watcher failed, restarting in {STREAM_RESTART_SECONDS}s: {e}")
+            _publish("resync", {})
+            await asyncio.sleep(STREAM_RESTART_SECONDS)
+
+async def refresh_stream_counters():
+    # Called when the active wave changes under connected dashboards
+    if _stream_counters:
+        await _load_stream_counters()
+        _publish("resync", {})
+
+def _subscribe() -> asyncio.Queue:
+    global _stream_task
+    queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    _stream_subscribers.add(queue)
+    if _stream_task is None or _stream_task.done():
+        _stream_task = asyncio.create_task(_watch_responses())
+    return queue
+
+def _unsubscribe(queue: asyncio.Queue):
+    global _stream_task
+    _stream_subscribers.discard(queue)
+    if not _stream_subscribers and _stream_task is not None:
+        _stream_task.cancel()
+        _stream_task = None
+        _stream_counters.clear()
+
+async def _event_stream(request: Request, queue: asyncio.Queue):
+    try:
+        while not _stream_counters:
+            if _stream_task is None or _stream_task.done() or await request.is_disconnected():
+                return
+            await asyncio.sleep(0.05)
+        yield _format_sse("stats", _counters_payload())
+        while not await request.is_disconnected():
+            if _stream_task is None or _stream_task.done():
+                # No watcher behind this stream any more: close it so the
+                # browser's EventSource reconnects and starts a new one
+                return
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _format_sse(event, data)
+    finally:
+        _unsubscribe(queue)
+
+# Stream new submissions and updated counters as Server-Sent Events
+# Registered outside admin_router so it can take the token from the query
+@api_router.get("/admin/stream", dependencies=[Depends(require_stream_admin)])
+async def stream_responses(request: Request):
+    queue = _subscribe()
+    return StreamingResponse(
+        _event_stream(request, queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Export to Excel
-@api_router.get("/admin/export")
+# Workbooks are built in worker processes so large exports neither block the
+# event loop nor serialize on one core; the pool is created on first use.
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', str(os.cpu_count() or 1)))
+EXPORT_LIMIT = 10000
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_export_pool: Optional[ProcessPoolExecutor] = None
+
+def get_export_pool() -> ProcessPoolExecutor:
+    global _export_pool
+    if _export_pool is None:
+        # spawn rather than fork: the parent holds Mongo monitor threads
+        _export_pool = ProcessPoolExecutor(
+            max_workers=EXPORT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _export_pool
+
+def shutdown_export_pool():
+    global _export_pool
+    if _export_pool is not None:
+        _export_pool.shutdown(wait=False, cancel_futures=True)
+        _export_pool = None
+
+async def run_export_job(func, *args):
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_export_pool(), func, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM); start a fresh pool for the next export
+        shutdown_export_pool()
+        raise
+
+def build_export_headers(questions: List[Dict[str, Any]]) -> Tuple[List[str], List[str]]:
+    base_headers = ["ID", "Branch", "Section", "WD Destination", "DMS ID - Name"]
+    question_headers = [f"Q{q['question_number']}: {q['question_text'][:50]}" for q in questions]
+    question_keys = [f"q{q['question_number']}" for q in questions]
+    return base_headers + question_headers + ["Submitted At"], question_keys
+
+def build_workbook(headers: List[str], question_keys: List[str], responses: List[Dict[str, Any]]) -> bytes:
+    # Runs in an export worker process, so it only touches its arguments
+    import xlsxwriter
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output)
+    worksheet = workbook.add_worksheet("Survey Responses")
+    
+    for col, header in enumerate(headers):
+        worksheet.write(0, col, header)
+    
+    for row, response in enumerate(responses, start=1):
+        worksheet.write(row, 0, response.get("id", ""))
+        worksheet.write(row, 1, response.get("branch", ""))
+        worksheet.write(row, 2, response.get("section", ""))
+        worksheet.write(row, 3, response.get("wd_destination", ""))
+        worksheet.write(row, 4, response.get("dms_id_name", ""))
+        
+        # Write dynamic question responses
+        responses_data = response.get("responses", {})
+        for col_offset, q_key in enumerate(question_keys):
+            answer = responses_data.get(q_key, "")
+            # Handle list answers
+            if isinstance(answer, list):
+                answer = ", ".join(answer)
+            worksheet.write(row, 5 + col_offset, str(answer) if answer else "")
+        
+        worksheet.write(row, 5 + len(question_keys), response.get("submitted_at", ""))
+    
+    workbook.close()
+    return output.getvalue()
+
+async def load_export_questions(
+    wave_query: Dict[str, Any], wave_doc: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    # Get all questions to build dynamic headers, using the wave's own
+    # question snapshot so closed waves export with the survey they ran
+    if wave_query and wave_doc is None:
+        wave_doc = await db.survey_waves.find_one({"id": wave_query["wave_id"]}, {"_id": 0, "questions": 1})
+    if wave_doc and wave_doc.get("questions"):
+        return wave_doc["questions"]
+    return await get_questions()
+
+async def load_export_data(
+    branch: Optional[str], section: Optional[str], wave: Optional[str], limit: int = EXPORT_LIMIT
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    query = build_response_query(branch, section)
+    wave_query = await resolve_wave_query(wave)
+    query.update(wave_query)
+    
+    wave_doc = await get_archived_wave(wave_query)
+    if wave_doc:
+        responses = await asyncio.to_thread(
+            read_archived_responses, wave_doc["archive_path"], branch, section, None, None, limit
+        )
+    else:
+        responses = await db.survey_responses.find(query, RESPONSE_PROJECTION).to_list(limit)
+    await decode_responses(responses)
+    return responses, await load_export_questions(wave_query, wave_doc)
+
+def archived_branches(path: str, section: Optional[str] = None) -> List[str]:
+    import pyarrow.compute as pc
+    table = load_archive_table(path)
+    if section:
+        table = table.filter(pc.equal(table["section"], section))
+    return pc.unique(table["branch"]).to_pylist()
+
+async def list_export_branches(section: Optional[str], wave: Optional[str]) -> List[str]:
+    wave_query = await resolve_wave_query(wave)
+    wave_doc = await get_archived_wave(wave_query)
+    if wave_doc:
+        branches = await asyncio.to_thread(archived_branches, wave_doc["archive_path"], section)
+    else:
+        query = build_response_query(None, section)
+        query.update(wave_query)
+        branches = await db.survey_responses.distinct("branch", query)
+    return sorted(branch for branch in branches if branch)
+
+@admin_router.get("/export", dependencies=[Depends(rate_limit("export", per_admin=True)), Depends(admission("export"))])
 async def export_responses(
     branch: Optional[str] = None,
-    section: Optional[str] = None
+    section: Optional[str] = None,
+    wave: Optional[str] = None
+):
+    try:
+        responses, questions = await load_export_data(branch, section, wave)
+        headers, question_keys = build_export_headers(questions)
+        
+        content = await run_export_job(build_workbook, headers, question_keys, responses)
+        
+        return StreamingResponse(
+            io.BytesIO(content),
+            media_type=XLSX_MEDIA_TYPE,
+            headers={"Content-Disposition": "attachment; filename=survey_responses.xlsx"}
+        )
+    except Exception as e:
+        logging.error(f"Error exporting data: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+class _ZipStreamBuffer(io.RawIOBase):
+    # Unseekable sink for zipfile: it writes local headers with data
+    # descriptors, and the bytes are drained to the client after each part
+    def __init__(self):
+        self._chunks: List[bytes] = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def _bundle_filename(branch: str) -> str:
+    return f"{re.sub(r'[^A-Za-z0-9_-]+', '_', branch).strip('_') or 'branch'}.xlsx"
+
+async def _bundle_stream(tasks: List[asyncio.Future]):
+    sink = _ZipStreamBuffer()
+    truncated = []
+    try:
+        # Workbooks are already deflated, so parts are stored as-is
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as bundle:
+            for finished in asyncio.as_completed(tasks):
+                branch, content, complete = await finished
+                bundle.writestr(_bundle_filename(branch), content)
+                if not complete:
+                    truncated.append(branch)
+                yield sink.drain()
+            if truncated:
+                # Say so inside the archive rather than cutting parts silently
+                bundle.writestr("TRUNCATED.txt", (
+                    f"These branches have more than {EXPORT_LIMIT} responses; their workbooks "
+                    f"hold the first {EXPORT_LIMIT}. Export them one section at a time.\n\n"
+                    + "\n".join(sorted(truncated)) + "\n"
+                ))
+        yield sink.drain()
+    except Exception as e:
+        # Headers are already sent, so the client sees a truncated archive
+        logging.error(f"Error building export bundle: {e}")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+# One workbook per branch, built in parallel and streamed back as a ZIP.
+# Each branch is loaded on its own (up to EXPORT_LIMIT responses), at most
+# EXPORT_WORKERS at a time so only the parts being built sit in memory.
+# The export slot is held until every part is built or cancelled, not just
+# until the handler returns, so bundles stay inside EXPORT_CONCURRENCY.
+@admin_router.get("/export/bundle", dependencies=[Depends(rate_limit("export", per_admin=True))])
+async def export_bundle(
+    section: Optional[str] = None,
+    wave: Optional[str] = None
+):
+    await acquire_admission("export")
+    try:
+        branches = await list_export_branches(section, wave)
+        headers, question_keys = build_export_headers(
+            await load_export_questions(await resolve_wave_query(wave))
+        )
+        building = asyncio.Semaphore(EXPORT_WORKERS)
+        
+        async def build_part(branch: str):
+            async with building:
+                part, _ = await load_export_data(branch, section, wave, EXPORT_LIMIT + 1)
+                complete = len(part) <= EXPORT_LIMIT
+                content = await run_export_job(build_workbook, headers, question_keys, part[:EXPORT_LIMIT])
+                return branch, content, complete
+        
+        tasks = [asyncio.ensure_future(build_part(branch)) for branch in branches]
+    except Exception as e:
+        release_admission("export")
+        logging.error(f"Error exporting bundle: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Released even if the client goes away before the body is streamed
+    builds = asyncio.gather(*tasks, return_exceptions=True)
+    builds.add_done_callback(lambda _: release_admission("export"))
+    return StreamingResponse(
+        _bundle_stream(tasks),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=survey_responses_by_branch.zip"}
+    )
+
+# Cross-tab pivot: one question's answers broken down by an outlet dimension
+@admin_router.get("/analytics/crosstab", dependencies=[Depends(admission("stats"))])
+async def get_crosstab(
+    question: str,
+    by: str = "branch",
+    branch: Optional[str] = None,
+    section: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    wave: Optional[str] = None
+):
+    if by not in CROSSTAB_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"by must be one of {sorted(CROSSTAB_DIMENSIONS)}")
+    if not QUESTION_KEY_PATTERN.match(question):
+        raise HTTPException(status_code=400, detail="question must look like q3")
+    try:
+        wave_query = await resolve_wave_query(wave)
+        version = await get_question_set_version()
+        cache_key = (
+            question, by, branch, section, start_date, end_date,
+            wave_query.get("wave_id", "all"), version
+        )
+        cached = _crosstab_cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] <= CROSSTAB_CACHE_TTL_SECONDS:
+            _crosstab_cache.move_to_end(cache_key)
+            return cached[1]
+        
+        query = build_response_query(branch, section, start_date, end_date)
+        query.update(wave_query)
+        query[f"responses.{question}"] = {"$exists": True, "$nin": [None, "", []]}
+        
+        # Multi-select answers unwind into one cell each, so row percentages
+        # are taken over respondents rather than over answer cells
+        result = (await db.survey_responses.aggregate([
+            {"$match": query},
+            {"$project": {"dim": f"${by}", "answer": f"$responses.{question}", "version": "$answer_version"}},
+            {"$facet": {
+                "rows": [{"$group": {"_id": "$dim", "respondents": {"$sum": 1}}}],
+                "cells": [
+                    {"$unwind": "$answer"},
+                    {"$group": {
+                        "_id": {"dim": "$dim", "answer": "$answer", "version": "$version"},
+                        "count": {"$sum": 1}
+                    }}
+                ]
+            }}
+        ]).to_list(1))[0]
+        
+        # Order columns as the question lists its options, extras after
+        question_doc = next(
+            (q for q in await get_questions() if q["question_number"] == int(question[1:])), {}
+        )
+        option_order = [o["value"] for o in question_doc.get("options", [])]
+        trigger = question_doc.get("conditional_trigger")
+        
+        # "Trigger: free text" answers count towards the trigger option
+        # and compact cells (option index or bitmask) decode to their labels
+        counts: Dict[tuple, int] = {}
+        for cell in result["cells"]:
+            answers = cell["_id"]["answer"]
+            answer_version = cell["_id"].get("version")
+            if answer_version is not None:
+                codec = await get_codec(answer_version)
+                if codec is not None:
+                    answers = codec.decode_value(question, answers)
+            for answer in answers if isinstance(answers, list) else [answers]:
+                answer = str(answer)
+                if trigger and answer.startswith(f"{trigger}:"):
+                    answer = trigger
+                key = (cell["_id"]["dim"], answer)
+                counts[key] = counts.get(key, 0) + cell["count"]
+        
+        seen_answers = {answer for _, answer in counts}
+        known = set(option_order)
+        columns = [o for o in option_order if o in seen_answers]
+        columns += sorted(a for a in seen_answers if a not in known)
+        
+        rows = sorted(item["_id"] for item in result["rows"] if item["_id"] is not None)
+        row_totals = {item["_id"]: item["respondents"] for item in result["rows"]}
+        
+        matrix = [[counts.get((row, col), 0) for col in columns] for row in rows]
+        percentages = [
+            [round(count / row_totals[row] * 100, 1) if row_totals[row] else 0 for count in matrix_row]
+            for row, matrix_row in zip(rows, matrix)
+        ]
+        
+        report = {
+            "question": question,
+            "question_text": question_doc.get("question_text"),
+            "by": by,
+            "rows": rows,
+            "columns": columns,
+            "counts": matrix,
+            "row_totals": [row_totals[row] for row in rows],
+            "row_percentages": percentages,
+            "total_respondents": sum(row_totals[row] for row in rows),
+            "question_set_version": version
+        }
+        _crosstab_cache[cache_key] = (time.monotonic(), report)
+        _crosstab_cache.move_to_end(cache_key)
+        if len(_crosstab_cache) > CROSSTAB_CACHE_SIZE:
+            _crosstab_cache.popitem(last=False)
+        return report
+    except Exception as e:
+        logging.error(f"Error building crosstab: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Daily response trend served from response_rollups
+@admin_router.get("/analytics/trend")
+async def get_trend(
+    days: int = 90,
+    branch: Optional[str] = None,
+    section: Optional[str] = None,
+    question: Optional[str] = None
 ):
+    if question and not QUESTION_KEY_PATTERN.match(question):
+        raise HTTPException(status_code=400, detail="question must look like q3")
     try:
-        query = {}
+        days = min(max(days, 1), 366)
+        today = datetime.now(timezone.utc).date()
+        first_day = today - timedelta(days=days - 1)
+        
+        query = {"day": {"$gte": first_day.isoformat()}}
         if branch:
             query["branch"] = branch
         if section:
             query["section"] = section
+        projection = {"_id": 0, "day": 1, "count": 1}
+        if question:
+            projection[f"answers.{question}"] = 1
         
-        responses = await db.survey_responses.find(query, {"_id": 0}).to_list(10000)
-        
-        # Get all questions to build dynamic headers
-        questions = await db.survey_questions.find({}, {"_id": 0}).sort("question_number", 1).to_list(100)
-        
-        # Create Excel file in memory
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output)
-        worksheet = workbook.add_worksheet("Survey Responses")
-        
-        # Build headers dynamically
-        base_headers = ["ID", "Branch", "Section", "WD Destination", "DMS ID - Name"]
-        question_headers = [f"Q{q['question_number']}: {q['question_text'][:50]}" for q in questions]
-        headers = base_headers + question_headers + ["Submitted At"]
-        
-        for col, header in enumerate(headers):
-            worksheet.write(0, col, header)
-        
-        # Data
-        for row, response in enumerate(responses, start=1):
-            worksheet.write(row, 0, response.get("id", ""))
-            worksheet.write(row, 1, response.get("branch", ""))
-            worksheet.write(row, 2, response.get("section", ""))
-            worksheet.write(row, 3, response.get("wd_destination", ""))
-            worksheet.write(row, 4, response.get("dms_id_name", ""))
-            
-            # Write dynamic question responses
-            responses_data = response.get("responses", {})
-            for col_offset, q in enumerate(questions):
-                q_key = f"q{q['question_number']}"
-                answer = responses_data.get(q_key, "")
-                # Handle list answers
-                if isinstance(answer, list):
-                    answer = ", ".join(answer)
-                worksheet.write(row, 5 + col_offset, str(answer) if answer else "")
-            
-            worksheet.write(row, 5 + len(questions), response.get("submitted_at", ""))
-        
-        workbook.close()
-        output.seek(0)
+        totals: Dict[str, int] = {}
+        tallies: Dict[str, Dict[str, int]] = {}
+        async for rollup in db.response_rollups.find(query, projection):
+            day = rollup["day"]
+            totals[day] = totals.get(day, 0) + rollup["count"]
+            if question:
+                day_tallies = tallies.setdefault(day, {})
+                for option, count in rollup.get("answers", {}).get(question, {}).items():
+                    option = decode_rollup_key(option)
+                    day_tallies[option] = day_tallies.get(option, 0) + count
         
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": "attachment; filename=survey_responses.xlsx"}
+        series = []
+        for offset in range(days):
+            day = (first_day + timedelta(days=offset)).isoformat()
+            point = {"day": day, "count": totals.get(day, 0)}
+            if question:
+                point["answers"] = tallies.get(day, {})
+            series.append(point)
+        
+        return {"days": series, "total": sum(totals.values()), "question": question}
+    except Exception as e:
+        logging.error(f"Error fetching trend: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@admin_router.post("/analytics/rollups/rebuild")
+async def rebuild_rollups_endpoint():
+    try:
+        rollups = await rebuild_rollups()
+        return {"success": True, "rollups": rollups}
+    except Exception as e:
+        logging.error(f"Error rebuilding rollups: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Completion across every branch, section and WD destination in one call
+@admin_router.get("/completion", dependencies=[Depends(admission("stats"))])
+async def get_completion(branch: Optional[str] = None, wave: Optional[str] = None):
+    try:
+        branch_match = {"branch": branch} if branch else {}
+        wave_query = await resolve_wave_query(wave)
+        response_match = {**branch_match, **wave_query}
+        outlets, outlet_match = await get_wave_outlets(wave_query)
+        
+        totals, completed = await asyncio.gather(
+            outlets.aggregate([
+                {"$match": {**outlet_match, **branch_match}},
+                {"$group": {
+                    "_id": {"branch": "$branch", "section": "$section", "wd_destination": "$wd_destination"},
+                    "total": {"$sum": 1}
+                }}
+            ]).to_list(None),
+            db.survey_responses.aggregate([
+                {"$match": response_match},
+                {"$group": {"_id": {
+                    "section": "$section", "wd_destination": "$wd_destination", "dms_id_name": "$dms_id_name"
+                }}},
+                {"$group": {
+                    "_id": {"section": "$_id.section", "wd_destination": "$_id.wd_destination"},
+                    "completed": {"$sum": 1}
+                }}
+            ]).to_list(None)
         )
+        completed_by_wd = {
+            (item["_id"]["section"], item["_id"]["wd_destination"]): item["completed"] for item in completed
+        }
+        
+        def entry(total, done, **keys):
+            return {
+                **keys,
+                "total_dms_ids": total,
+                "completed_surveys": done,
+                "completion_percentage": round(done / total * 100, 1) if total > 0 else 0
+            }
+        
+        by_wd, by_section, by_branch = [], {}, {}
+        for item in totals:
+            key = item["_id"]
+            done = completed_by_wd.get((key["section"], key["wd_destination"]), 0)
+            by_wd.append(entry(item["total"], done, **key))
+            section_key = (key["branch"], key["section"])
+            section_totals = by_section.setdefault(section_key, [0, 0])
+            branch_totals = by_branch.setdefault(key["branch"], [0, 0])
+            for running in (section_totals, branch_totals):
+                running[0] += item["total"]
+                running[1] += done
+        
+        total_outlets = sum(total for total, _ in by_branch.values())
+        total_completed = sum(done for _, done in by_branch.values())
+        return {
+            "overall": entry(total_outlets, total_completed),
+            "branches": [entry(t, d, branch=b) for b, (t, d) in sorted(by_branch.items())],
+            "sections": [entry(t, d, branch=b, section=sec) for (b, sec), (t, d) in sorted(by_section.items())],
+            "wd_destinations": sorted(by_wd, key=lambda e: (e["branch"], e["section"], e["wd_destination"]))
+        }
     except Exception as e:
-        logging.error(f"Error exporting data: {e}")
+        logging.error(f"Error fetching completion: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Admission control counters
+@admin_router.get("/metrics")
+async def get_admission_metrics():
+    return {
+        "admission": {
+            scope: {
+                **counters,
+                "concurrency_limit": CONCURRENCY_LIMITS.get(scope),
+                "rate_per_minute": RATE_LIMITS[scope][0] * 60 if scope in RATE_LIMITS else None
+            }
+            for scope, counters in _admission_metrics.items()
+        },
+        "tracked_clients": len(_buckets)
+    }
+
+# Survey wave management
+@admin_router.get("/waves")
+async def get_waves():
+    try:
+        waves = await db.survey_waves.find({}, {"_id": 0, "questions": 0}).sort("opened_at", -1).to_list(100)
+        return {"waves": waves}
+    except Exception as e:
+        logging.error(f"Error fetching waves: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@admin_router.post("/waves")
+async def open_wave(wave: WaveCreate):
+    try:
+        # Only one wave is open at a time; opening a new one closes the last.
+        # Read it from Mongo, as this worker's cached copy may be stale
+        active = await db.survey_waves.find_one({"status": "open"}, {"_id": 0, "id": 1})
+        if active:
+            await close_wave(active["id"])
+        
+        wave_id = str(uuid.uuid4())
+        questions = await get_questions()
+        
+        # Snapshot the outlet master server-side so later reloads of
+        # survey_data don't change what this wave is measured against
+        await db.survey_data.aggregate([
+            {"$project": {"_id": 0, "branch": 1, "section": 1, "wd_destination": 1, "dms_id_name": 1}},
+            {"$addFields": {"wave_id": wave_id}},
+            {"$merge": {"into": "survey_wave_outlets"}}
+        ]).to_list(None)
+        outlet_count = await db.survey_wave_outlets.count_documents({"wave_id": wave_id})
+        
+        doc = {
+            "id": wave_id,
+            "name": wave.name,
+            "status": "open",
+            "question_set_version": await get_question_set_version(),
+            "questions": questions,
+            "outlet_snapshot": True,
+            "outlet_count": outlet_count,
+            "opened_at": datetime.now(timezone.utc).isoformat(),
+            "closed_at": None,
+            "summary": None
+        }
+        try:
+            await db.survey_waves.insert_one(doc)
+        except DuplicateKeyError:
+            # Another admin opened a wave at the same moment
+            await db.survey_wave_outlets.delete_many({"wave_id": wave_id})
+            raise HTTPException(status_code=409, detail="Another wave was opened at the same time")
+        reset_active_wave()
+        await refresh_stream_counters()
+        
+        doc.pop("_id", None)
+        doc.pop("questions")
+        return {"success": True, "wave": doc}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error opening wave: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@admin_router.post("/waves/{wave_id}/close")
+async def close_wave_endpoint(wave_id: str):
+    try:
+        wave = await close_wave(wave_id)
+        if wave is None:
+            raise HTTPException(status_code=404, detail="Open wave not found")
+        await refresh_stream_counters()
+        return {"success": True, "wave": wave}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error closing wave: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # Question Management Endpoints
-@api_router.get("/admin/questions")
+@api_router.get("/questions")
+@admin_router.get("/questions")
 async def get_all_questions():
     try:
-        questions = await db.survey_questions.find({}, {"_id": 0}).sort("question_number", 1).to_list(100)
-        return {"questions": questions}
+        return {"questions": await get_questions()}
     except Exception as e:
         logging.error(f"Error fetching questions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.post("/admin/questions")
+# Replace the whole ordered question set in one step (reorder, import, edit)
+@admin_router.put("/questions")
+async def replace_questions(question_set: QuestionSetReplace):
+    ids = [item.id for item in question_set.questions if item.id]
+    if len(ids) != len(set(ids)):
+        raise HTTPException(status_code=400, detail="Duplicate question ids")
+    try:
+        now = datetime.now(timezone.utc).isoformat()
+        existing = set(await db.survey_questions.distinct("id", {"id": {"$in": ids}}))
+        new_numbers = iter(await reserve_question_numbers(
+            sum(1 for item in question_set.questions if item.id not in existing)
+        ))
+        
+        operations = []
+        kept_ids = []
+        for position, item in enumerate(question_set.questions, start=1):
+            fields = item.model_dump(exclude={"id", "question_number"})
+            fields["position"] = position
+            if item.id in existing:
+                # question_number stays as stored: it is the answer key
+                operations.append(UpdateOne({"id": item.id}, {"$set": {**fields, "updated_at": now}}))
+                kept_ids.append(item.id)
+            else:
+                fields["question_number"] = next(new_numbers)
+                new_question = SurveyQuestion(**fields, **({"id": item.id} if item.id else {}))
+                doc = new_question.model_dump()
+                doc['created_at'] = doc['created_at'].isoformat()
+                doc['updated_at'] = doc['updated_at'].isoformat()
+                operations.append(InsertOne(doc))
+                kept_ids.append(doc["id"])
+        operations.append(DeleteMany({"id": {"$nin": kept_ids}}))
+        
+        version = await apply_question_set(operations)
+        return {"success": True, "question_set_version": version, "questions": await get_questions()}
+    except Exception as e:
+        logging.error(f"Error replacing questions: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@admin_router.post("/questions")
 async def create_question(question: QuestionCreate):
     try:
-        new_question = SurveyQuestion(**question.model_dump())
+        # New questions go to the end of the display order
+        last = await db.survey_questions.find_one({}, {"_id": 0, "position": 1}, sort=[("position", -1)])
+        fields = question.model_dump()
+        fields["question_number"] = await claim_question_number(question.question_number)
+        new_question = SurveyQuestion(**fields, position=(last or {}).get("position", 0) + 1)
         doc = new_question.model_dump()
         doc['created_at'] = doc['created_at'].isoformat()
         doc['updated_at'] = doc['updated_at'].isoformat()
         
         await db.survey_questions.insert_one(doc)
+        await bump_question_set_version()
         return {"success": True, "question": new_question.model_dump(exclude={'created_at', 'updated_at'})}
     except Exception as e:
         logging.error(f"Error creating question: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.put("/admin/questions/{question_id}")
+@admin_router.put("/questions/{question_id}")
 async def update_question(question_id: str, question_update: QuestionUpdate):
     try:
         update_data = {k: v for k, v in question_update.model_dump().items() if v is not None}
@@ -373,6 +2209,7 @@ async def update_question(question_id: str, question_update: QuestionUpdate):
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Question not found")
         
+        await bump_question_set_version()
         return {"success": True, "message": "Question updated"}
     except HTTPException:
         raise
@@ -380,7 +2217,7 @@ async def update_question(question_id: str, question_update: QuestionUpdate):
         logging.error(f"Error updating question: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.delete("/admin/questions/{question_id}")
+@admin_router.delete("/questions/{question_id}")
 async def delete_question(question_id: str):
     try:
         result = await db.survey_questions.delete_one({"id": question_id})
@@ -388,6 +2225,7 @@ async def delete_question(question_id: str):
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Question not found")
         
+        await bump_question_set_version()
         return {"success": True, "message": "Question deleted"}
     except HTTPException:
         raise
@@ -395,15 +2233,7 @@ async def delete_question(question_id: str):
         logging.error(f"Error deleting question: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-app.include_router(api_router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+api_router.include_router(admin_router)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -411,6 +2241,51 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+WARM_UP_RETRY_SECONDS = 5
+
+async def warm_up(app: FastAPI):
+    # Runs after startup so the server answers /health/live (and 503 on
+    # /health/ready) while indexes build and caches fill
+    started = time.monotonic()
+    while True:
+        try:
+            await client.admin.command("ping")
+            await initialize_data()
+            await warm_caches()
+            break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Warm-up failed, retrying in {WARM_UP_RETRY_SECONDS}s: {e}")
+            await asyncio.sleep(WARM_UP_RETRY_SECONDS)
+    app.state.ready = True
+    logger.info(f"Ready in {time.monotonic() - started:.2f}s")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_task = asyncio.create_task(warm_up(app))
+    
+    yield
+    
+    app.state.ready = False
+    warm_up_task.cancel()
+    if _stream_task is not None:
+        _stream_task.cancel()
+    shutdown_export_pool()
+    client.close()
+
+def create_app() -> FastAPI:
+    app = FastAPI(lifespan=lifespan)
+    app.state.ready = False
+    app.include_router(api_router)
+    
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    return app
+
+app = create_app()
\ No newline at end of file
@@ -11,7 +11,14 @@ Tests for:
 import pytest
 import requests
 import os
+import json
 import uuid
+import io
+import zipfile
+import openpyxl
+import sys
+from pathlib import Path
+from functools import lru_cache
 from datetime import datetime
 
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
@@ -21,6 +28,16 @@ ADMIN_EMAIL = "vickyvikas@itc.in"
 ADMIN_PASSWORD = "vickyvikas"
 
 
+@lru_cache(maxsize=1)
+def admin_headers():
+    """Log in once and reuse the signed admin token for admin routes"""
+    response = requests.post(
+        f"{BASE_URL}/api/admin/login",
+        json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}
+    )
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
 class TestHealthCheck:
     """Health check - verify API is running"""
     
@@ -32,6 +49,15 @@ class TestHealthCheck:
         assert "message" in data
         assert data["message"] == "ITC Survey API"
         print("✅ API root endpoint working")
+    
+    def test_health_probes(self):
+        """Test GET /api/health/live and /api/health/ready"""
+        live = requests.get(f"{BASE_URL}/api/health/live")
+        assert live.status_code == 200
+        ready = requests.get(f"{BASE_URL}/api/health/ready")
+        assert ready.status_code == 200
+        assert ready.json()["status"] == "ready"
+        print("✅ Health probes report live and ready")
 
 
 class TestCascadingDropdowns:
@@ -122,6 +148,22 @@ class TestCascadingDropdowns:
             print(f"✅ Section {test_section}: {data['completion_percentage']}% complete ({data['completed_surveys']}/{data['total_dms_ids']})")
         else:
             pytest.skip("No sections available")
+    
+    def test_get_worklist(self):
+        """Test GET /api/worklist/{section} - outlets not yet surveyed"""
+        branches = requests.get(f"{BASE_URL}/api/branches").json()["branches"]
+        sections = requests.get(f"{BASE_URL}/api/sections/{branches[0]}").json()["sections"]
+        
+        if len(sections) > 0:
+            test_section = sections[0]
+            response = requests.get(f"{BASE_URL}/api/worklist/{test_section}")
+            assert response.status_code == 200
+            data = response.json()
+            assert data["pending_count"] == sum(len(g["pending"]) for g in data["worklist"])
+            assert data["pending_count"] <= data["total_dms_ids"]
+            print(f"✅ Worklist for {test_section}: {data['pending_count']}/{data['total_dms_ids']} pending")
+        else:
+            pytest.skip("No sections available")
 
 
 class TestAdminAuthentication:
@@ -138,7 +180,8 @@ class TestAdminAuthentication:
         assert "token" in data
         assert "email" in data
         assert data["email"] == ADMIN_EMAIL
-        assert data["token"].startswith("admin_token_")
+        assert "expires_at" in data
+        assert data["token"].count(".") == 1
         print(f"✅ Admin login successful for {ADMIN_EMAIL}")
     
     def test_admin_login_invalid_credentials(self):
@@ -161,13 +204,43 @@ class TestAdminAuthentication:
         assert response.status_code == 401
         print("✅ Wrong password correctly rejected with 401")
 
+    def test_admin_login_non_ascii_email(self):
+        """Test POST /api/admin/login - non-ASCII email is rejected, not a 500"""
+        response = requests.post(
+            f"{BASE_URL}/api/admin/login",
+            json={"email": "admin@ïtc.in", "password": "wrongpassword"}
+        )
+        assert response.status_code in (401, 422)
+        print(f"✅ Non-ASCII email rejected with {response.status_code}")
+
+    def test_admin_route_requires_token(self):
+        """Test admin routes reject missing and tampered tokens with 401"""
+        response = requests.get(f"{BASE_URL}/api/admin/stats")
+        assert response.status_code == 401
+        
+        token = admin_headers()["Authorization"]
+        tampered = {"Authorization": token[:-4] + ("AAAA" if not token.endswith("AAAA") else "BBBB")}
+        response = requests.get(f"{BASE_URL}/api/admin/stats", headers=tampered)
+        assert response.status_code == 401
+        
+        response = requests.get(f"{BASE_URL}/api/admin/stats", headers=admin_headers())
+        assert response.status_code == 200
+        print("✅ Admin routes require a valid signed token")
+    
+    def test_public_questions(self):
+        """Test GET /api/questions - survey page reads questions without a token"""
+        response = requests.get(f"{BASE_URL}/api/questions")
+        assert response.status_code == 200
+        assert len(response.json()["questions"]) >= 7
+        print("✅ Public questions endpoint working")
+
 
 class TestSurveyQuestions:
     """Test survey questions API - CRUD operations"""
     
     def test_get_all_questions(self):
         """Test GET /api/admin/questions - returns all survey questions"""
-        response = requests.get(f"{BASE_URL}/api/admin/questions")
+        response = requests.get(f"{BASE_URL}/api/admin/questions", headers=admin_headers())
         assert response.status_code == 200
         data = response.json()
         assert "questions" in data
@@ -190,7 +263,7 @@ class TestSurveyQuestions:
     
     def test_questions_have_correct_types(self):
         """Verify questions have correct types: single, multi"""
-        response = requests.get(f"{BASE_URL}/api/admin/questions")
+        response = requests.get(f"{BASE_URL}/api/admin/questions", headers=admin_headers())
         questions = response.json()["questions"]
         
         # Count question types
@@ -203,7 +276,7 @@ class TestSurveyQuestions:
     
     def test_conditional_questions_exist(self):
         """Verify Q5 and Q7 have conditional input triggers"""
-        response = requests.get(f"{BASE_URL}/api/admin/questions")
+        response = requests.get(f"{BASE_URL}/api/admin/questions", headers=admin_headers())
         questions = response.json()["questions"]
         
         q5 = next((q for q in questions if q["question_number"] == 5), None)
@@ -236,7 +309,8 @@ class TestSurveyQuestions:
         
         response = requests.post(
             f"{BASE_URL}/api/admin/questions",
-            json=test_question
+            json=test_question,
+            headers=admin_headers()
         )
         assert response.status_code == 200
         data = response.json()
@@ -248,15 +322,88 @@ class TestSurveyQuestions:
         print(f"✅ Created test question with ID: {created_id}")
         
         # Cleanup - delete the test question
-        delete_response = requests.delete(f"{BASE_URL}/api/admin/questions/{created_id}")
+        delete_response = requests.delete(f"{BASE_URL}/api/admin/questions/{created_id}", headers=admin_headers())
         assert delete_response.status_code == 200
         print("✅ Test question cleaned up")
     
     def test_delete_question_not_found(self):
         """Test DELETE /api/admin/questions/{id} - non-existent question"""
-        response = requests.delete(f"{BASE_URL}/api/admin/questions/nonexistent-id-12345")
+        response = requests.delete(f"{BASE_URL}/api/admin/questions/nonexistent-id-12345", headers=admin_headers())
         assert response.status_code == 404
         print("✅ Delete non-existent question correctly returns 404")
+    
+    def test_replace_question_set(self):
+        """Test PUT /api/admin/questions - reapplying the current set bumps the version only"""
+        questions = requests.get(f"{BASE_URL}/api/admin/questions", headers=admin_headers()).json()["questions"]
+        payload = {"questions": [
+            {k: v for k, v in q.items() if k not in ("created_at", "updated_at")} for q in questions
+        ]}
+        
+        response = requests.put(f"{BASE_URL}/api/admin/questions", json=payload, headers=admin_headers())
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] == True
+        assert [q["id"] for q in data["questions"]] == [q["id"] for q in questions]
+        assert [q["question_number"] for q in data["questions"]] == [q["question_number"] for q in questions]
+        print(f"✅ Question set reapplied as version {data['question_set_version']}")
+    
+    def test_reorder_keeps_answer_keys(self):
+        """Test PUT /api/admin/questions - reordering moves questions, not their stored answers"""
+        questions = requests.get(f"{BASE_URL}/api/admin/questions", headers=admin_headers()).json()["questions"]
+        assert len(questions) >= 2
+        payload_for = lambda items: {"questions": [
+            {k: v for k, v in q.items() if k not in ("created_at", "updated_at")} for q in items
+        ]}
+        first = questions[0]
+        marker = f"TEST_reorder_{uuid.uuid4().hex[:8]}"
+        response = requests.post(f"{BASE_URL}/api/survey/submit", json={
+            "branch": "TEST_reorder",
+            "section": "TEST_reorder",
+            "wd_destination": "TEST_reorder",
+            "dms_id_name": marker,
+            f"q{first['question_number']}": marker
+        })
+        assert response.status_code == 200
+        
+        try:
+            response = requests.put(
+                f"{BASE_URL}/api/admin/questions",
+                json=payload_for([questions[1], first] + questions[2:]),
+                headers=admin_headers()
+            )
+            assert response.status_code == 200
+            reordered = response.json()["questions"]
+            assert [q["id"] for q in reordered[:2]] == [questions[1]["id"], first["id"]]
+            numbers = {q["id"]: q["question_number"] for q in questions}
+            assert all(q["question_number"] == numbers[q["id"]] for q in reordered)
+            
+            response = requests.get(
+                f"{BASE_URL}/api/admin/export",
+                params={"branch": "TEST_reorder", "wave": "all"},
+                headers=admin_headers()
+            )
+            assert response.status_code == 200
+            sheet = openpyxl.load_workbook(io.BytesIO(response.content)).active
+            rows = list(sheet.iter_rows(values_only=True))
+            header = rows[0]
+            row = next(r for r in rows[1:] if r[4] == marker)
+            column = next(i for i, h in enumerate(header) if h.startswith(f"Q{first['question_number']}:"))
+            assert row[column] == marker
+            assert first["question_text"][:50] in header[column]
+        finally:
+            requests.put(f"{BASE_URL}/api/admin/questions", json=payload_for(questions), headers=admin_headers())
+        print("✅ Reordered questions keep their answer keys in exports")
+    
+    def test_replace_question_set_rejects_duplicate_ids(self):
+        """Test PUT /api/admin/questions - duplicate ids return 400"""
+        item = {"id": "dup", "question_text": "TEST_dup", "question_type": "text"}
+        response = requests.put(
+            f"{BASE_URL}/api/admin/questions",
+            json={"questions": [item, item]},
+            headers=admin_headers()
+        )
+        assert response.status_code == 400
+        print("✅ Duplicate question ids rejected")
 
 
 class TestSurveySubmission:
@@ -297,6 +444,25 @@ class TestSurveySubmission:
         assert "id" in data
         assert data["message"] == "Survey submitted successfully"
         print(f"✅ Survey submitted successfully with ID: {data['id']}")
+    
+    def test_submit_survey_invalid_base_fields(self):
+        """Test POST /api/survey/submit - missing or non-string outlet fields return 422"""
+        response = requests.post(
+            f"{BASE_URL}/api/survey/submit",
+            json={"branch": "TEST_branch", "section": 12, "wd_destination": "TEST_wd", "q1": "<Rs 1k"}
+        )
+        assert response.status_code == 422
+        errors = {tuple(error["loc"]): error["type"] for error in response.json()["detail"]}
+        assert errors[("body", "section")] == "string_type"
+        assert errors[("body", "dms_id_name")] == "missing"
+        
+        response = requests.post(
+            f"{BASE_URL}/api/survey/submit",
+            data="not json",
+            headers={"Content-Type": "application/json"}
+        )
+        assert response.status_code == 422
+        print("✅ Invalid submissions rejected with 422")
 
 
 class TestAdminResponses:
@@ -304,7 +470,7 @@ class TestAdminResponses:
     
     def test_get_all_responses(self):
         """Test GET /api/admin/responses - returns all survey responses"""
-        response = requests.get(f"{BASE_URL}/api/admin/responses")
+        response = requests.get(f"{BASE_URL}/api/admin/responses", headers=admin_headers())
         assert response.status_code == 200
         data = response.json()
         assert "responses" in data
@@ -316,7 +482,7 @@ class TestAdminResponses:
         """Test GET /api/admin/responses - with branch filter"""
         branches = requests.get(f"{BASE_URL}/api/branches").json()["branches"]
         
-        response = requests.get(f"{BASE_URL}/api/admin/responses?branch={branches[0]}")
+        response = requests.get(f"{BASE_URL}/api/admin/responses?branch={branches[0]}", headers=admin_headers())
         assert response.status_code == 200
         data = response.json()
         assert "responses" in data
@@ -326,9 +492,20 @@ class TestAdminResponses:
             assert r["branch"] == branches[0]
         print(f"✅ Branch filter working - {data['total']} responses for {branches[0]}")
     
+    def test_search_responses(self):
+        """Test GET /api/admin/responses/search - keyword search with facets"""
+        response = requests.get(f"{BASE_URL}/api/admin/responses/search?q=delivery", headers=admin_headers())
+        assert response.status_code == 200
+        data = response.json()
+        assert "responses" in data
+        assert "total" in data
+        assert set(data["facets"].keys()) == {"branch", "section", "date"}
+        assert sum(f["count"] for f in data["facets"]["branch"]) == data["total"]
+        print(f"✅ Search working - {data['total']} responses match 'delivery'")
+    
     def test_get_admin_stats(self):
         """Test GET /api/admin/stats - returns statistics"""
-        response = requests.get(f"{BASE_URL}/api/admin/stats")
+        response = requests.get(f"{BASE_URL}/api/admin/stats", headers=admin_headers())
         assert response.status_code == 200
         data = response.json()
         assert "total_responses" in data
@@ -338,11 +515,187 @@ class TestAdminResponses:
     
     def test_export_responses(self):
         """Test GET /api/admin/export - exports Excel file"""
-        response = requests.get(f"{BASE_URL}/api/admin/export")
+        response = requests.get(f"{BASE_URL}/api/admin/export", headers=admin_headers())
         assert response.status_code == 200
         assert "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" in response.headers.get("content-type", "")
         assert len(response.content) > 0
         print(f"✅ Export working - received {len(response.content)} bytes")
+    
+    def test_export_bundle(self):
+        """Test GET /api/admin/export/bundle - one workbook per branch in a ZIP"""
+        response = requests.get(f"{BASE_URL}/api/admin/export/bundle", params={"wave": "all"}, headers=admin_headers())
+        assert response.status_code == 200
+        assert "application/zip" in response.headers.get("content-type", "")
+        bundle = zipfile.ZipFile(io.BytesIO(response.content))
+        assert bundle.testzip() is None
+        assert all(name.endswith(".xlsx") for name in bundle.namelist())
+        print(f"✅ Export bundle working - {len(bundle.namelist())} branch workbooks")
+    
+    def test_admission_metrics(self):
+        """Test GET /api/admin/metrics - rate limit and admission counters"""
+        response = requests.get(f"{BASE_URL}/api/admin/metrics", headers=admin_headers())
+        assert response.status_code == 200
+        data = response.json()
+        for scope in ("submit", "export", "stats", "responses"):
+            assert scope in data["admission"]
+            for counter in ("allowed", "rate_limited", "queued", "rejected", "in_flight"):
+                assert counter in data["admission"][scope]
+        print(f"✅ Admission metrics: {data['admission']}")
+
+
+class TestAnalytics:
+    """Test admin analytics reports"""
+    
+    def test_crosstab_by_branch(self):
+        """Test GET /api/admin/analytics/crosstab - counts and row percentages"""
+        response = requests.get(
+            f"{BASE_URL}/api/admin/analytics/crosstab?question=q1&by=branch",
+            headers=admin_headers()
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["counts"]) == len(data["rows"]) == len(data["row_totals"])
+        assert isinstance(data["question_set_version"], int)
+        for counts, percentages in zip(data["counts"], data["row_percentages"]):
+            assert len(counts) == len(percentages) == len(data["columns"])
+        # q1 is single-select, so each row's percentages sum to ~100
+        for total, percentages in zip(data["row_totals"], data["row_percentages"]):
+            if total:
+                assert abs(sum(percentages) - 100) < 1
+        print(f"✅ Crosstab q1 x branch: {len(data['rows'])} rows x {len(data['columns'])} columns")
+    
+    def test_crosstab_rejects_unknown_dimension(self):
+        """Test GET /api/admin/analytics/crosstab - invalid 'by' returns 400"""
+        response = requests.get(
+            f"{BASE_URL}/api/admin/analytics/crosstab?question=q1&by=dms_id_name",
+            headers=admin_headers()
+        )
+        assert response.status_code == 400
+        print("✅ Crosstab rejects unsupported dimensions")
+    
+    def test_trend_from_rollups(self):
+        """Test GET /api/admin/analytics/trend - one point per day"""
+        response = requests.get(
+            f"{BASE_URL}/api/admin/analytics/trend?days=30&question=q1",
+            headers=admin_headers()
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["days"]) == 30
+        assert data["days"] == sorted(data["days"], key=lambda point: point["day"])
+        assert sum(point["count"] for point in data["days"]) == data["total"]
+        print(f"✅ Trend: {data['total']} responses over 30 days")
+    
+    def test_completion_heatmap(self):
+        """Test GET /api/admin/completion - every section in one call"""
+        response = requests.get(f"{BASE_URL}/api/admin/completion", headers=admin_headers())
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["sections"]) > 0
+        assert sum(s["total_dms_ids"] for s in data["sections"]) == data["overall"]["total_dms_ids"]
+        assert sum(b["completed_surveys"] for b in data["branches"]) == data["overall"]["completed_surveys"]
+        
+        # Matches the per-section endpoint the survey page uses
+        section = data["sections"][0]
+        single = requests.get(f"{BASE_URL}/api/section-completion/{section['section']}").json()
+        assert single["total_dms_ids"] >= section["total_dms_ids"]
+        print(f"✅ Completion: {data['overall']['completion_percentage']}% across {len(data['sections'])} sections")
+
+
+class TestSurveyWaves:
+    """Test survey wave listing and wave-scoped queries"""
+    
+    def test_get_waves(self):
+        """Test GET /api/admin/waves - lists waves without question snapshots"""
+        response = requests.get(f"{BASE_URL}/api/admin/waves", headers=admin_headers())
+        assert response.status_code == 200
+        data = response.json()
+        assert "waves" in data
+        open_waves = [w for w in data["waves"] if w["status"] == "open"]
+        assert len(open_waves) <= 1
+        for w in data["waves"]:
+            assert "questions" not in w
+            assert "question_set_version" in w
+        print(f"✅ Found {len(data['waves'])} waves ({len(open_waves)} open)")
+    
+    def test_stats_across_all_waves(self):
+        """Test GET /api/admin/stats?wave=all - covers at least the active wave"""
+        all_stats = requests.get(f"{BASE_URL}/api/admin/stats?wave=all", headers=admin_headers()).json()
+        active_stats = requests.get(f"{BASE_URL}/api/admin/stats", headers=admin_headers()).json()
+        assert all_stats["total_responses"] >= active_stats["total_responses"]
+        print(f"✅ Wave scoping: {active_stats['total_responses']} active / {all_stats['total_responses']} total")
+
+
+class TestLiveStream:
+    """Test admin live dashboard stream (Server-Sent Events)"""
+    
+    def test_stream_sends_initial_stats(self):
+        """Test GET /api/admin/stream - first event carries current counters"""
+        with requests.get(f"{BASE_URL}/api/admin/stream", headers=admin_headers(), stream=True, timeout=10) as response:
+            assert response.status_code == 200
+            assert "text/event-stream" in response.headers.get("content-type", "")
+            
+            lines = response.iter_lines(decode_unicode=True)
+            assert next(lines) == "event: stats"
+            data_line = next(lines)
+            assert data_line.startswith("data: ")
+            data = json.loads(data_line[len("data: "):])
+            assert "total_responses" in data
+            assert "responses_by_branch" in data
+        print(f"✅ Stream connected - {data['total_responses']} responses")
+    
+    def test_query_token_only_accepted_on_stream(self):
+        """Test ?token= - accepted by /api/admin/stream only, never by other admin routes"""
+        token = admin_headers()["Authorization"][len("Bearer "):]
+        response = requests.get(f"{BASE_URL}/api/admin/stats", params={"token": token})
+        assert response.status_code == 401
+        
+        with requests.get(f"{BASE_URL}/api/admin/stream", params={"token": token}, stream=True, timeout=10) as response:
+            assert response.status_code == 200
+        print("✅ Query-string token limited to the stream")
+
+
+class TestAnswerCodec:
+    """Test compact answer encoding in-process (no running server needed)"""
+
+    QUESTIONS = [
+        {"question_number": 1, "question_type": "single",
+         "options": [{"value": "Rs.5k"}, {"value": "Rs.1L"}, {"value": "Others"}]},
+        {"question_number": 7, "question_type": "multi",
+         "options": [{"value": "A"}, {"value": "B"}, {"value": "Relationship issue"}]},
+    ]
+
+    @pytest.fixture(scope="class")
+    def codec(self):
+        sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+        os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+        os.environ.setdefault("DB_NAME", "test_database")
+        from server import AnswerCodec
+        return AnswerCodec(3, self.QUESTIONS)
+
+    def test_round_trip(self, codec):
+        """Options encode to an index / bitmask and decode back to labels"""
+        responses = {"q1": "Rs.1L", "q7": ["A", "Relationship issue"], "q7_details": "late stock"}
+        encoded = {key: codec.encode_value(key, value) for key, value in responses.items()}
+        assert encoded == {"q1": 1, "q7": 0b101, "q7_details": "late stock"}
+        assert codec.decode(encoded) == responses
+        print("✅ Compact answers round-trip")
+
+    def test_free_text_kept_as_submitted(self, codec):
+        """Values outside the option list are stored and returned unchanged"""
+        responses = {"q1": "Others: Rs.20k", "q7": ["A", "Relationship issue: credit"]}
+        encoded = {key: codec.encode_value(key, value) for key, value in responses.items()}
+        assert encoded == responses
+        assert codec.decode(encoded) == responses
+        print("✅ Free-text answers stored as submitted")
+
+    def test_raw_int_not_read_as_index(self, codec):
+        """A raw number for a coded question is kept as text, not decoded as an option"""
+        encoded = {"q1": codec.encode_value("q1", 2), "q7": codec.encode_value("q7", 3)}
+        assert encoded == {"q1": "2", "q7": "3"}
+        assert codec.decode(encoded) == {"q1": "2", "q7": "3"}
+        assert codec.encode_value("q1", True) is True
+        print("✅ Raw integers survive compact encoding")
 
 
 if __name__ == "__main__":
@@ -61,6 +61,25 @@ const webpackConfig = {
         ],
       };
 
+      // Production builds: keep React and the router in their own long-lived
+      // vendor chunk so route chunks (survey, admin) can change without
+      // invalidating it. CRA already emits [contenthash] file names.
+      if (!isDevServer) {
+        webpackConfig.optimization.splitChunks = {
+          ...webpackConfig.optimization.splitChunks,
+          chunks: "all",
+          cacheGroups: {
+            ...(webpackConfig.optimization.splitChunks || {}).cacheGroups,
+            react: {
+              test: /[\\/]node_modules[\\/](react|react-dom|react-router|react-router-dom|scheduler)[\\/]/,
+              name: "vendor-react",
+              chunks: "all",
+              priority: 20,
+            },
+          },
+        };
+      }
+
       // Add health check plugin to webpack if enabled
       if (config.enableHealthCheck && healthPluginInstance) {
         webpackConfig.plugins.push(healthPluginInstance);
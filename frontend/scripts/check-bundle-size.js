@@ -0,0 +1,86 @@
+// Fails the build when a route's JavaScript grows past its gzip budget.
+// Reads the webpack stats written by `craco build --stats` (see the
+// "build:check" script), so every chunk a route loads is counted - including
+// the unnamed shared chunks splitChunks creates - and a budgeted chunk group
+// that disappears (renamed or merged) fails instead of counting as 0 KB.
+const fs = require("fs");
+const path = require("path");
+const zlib = require("zlib");
+
+const BUILD_DIR = path.resolve(__dirname, "../build");
+const STATS_FILE = path.join(BUILD_DIR, "bundle-stats.json");
+
+// Budgets in KB of gzipped JavaScript. These are provisional estimates, not
+// measured: reset each one to ~10% above the size the first
+// `yarn build:check` prints, and commit the measured numbers with it.
+const ENTRY_MAX_KB = 190; // every initial chunk of the main entry
+const ROUTE_BUDGETS = [
+  // Chunks a route loads on top of the entry, and the total download for it
+  { group: "survey", maxKb: 60, routeMaxKb: 250 },
+  { group: "admin", maxKb: 150, routeMaxKb: 340 },
+];
+// Named chunks that must exist for long-term caching to work
+const REQUIRED_CHUNKS = ["vendor-react"];
+
+if (!fs.existsSync(STATS_FILE)) {
+  console.error("No bundle-stats.json found - run `yarn build:check` (craco build --stats) first.");
+  process.exit(1);
+}
+
+const stats = JSON.parse(fs.readFileSync(STATS_FILE, "utf8"));
+let failed = false;
+
+const fail = (message) => {
+  failed = true;
+  console.error(`✗ ${message}`);
+};
+
+const jsAssets = (group) =>
+  (group.assets || [])
+    .map((asset) => (typeof asset === "string" ? asset : asset.name))
+    .filter((name) => name.endsWith(".js"));
+
+const sizeCache = new Map();
+const gzipKb = (file) => {
+  if (!sizeCache.has(file)) {
+    const data = fs.readFileSync(path.join(BUILD_DIR, file));
+    sizeCache.set(file, zlib.gzipSync(data, { level: 9 }).length / 1024);
+  }
+  return sizeCache.get(file);
+};
+const totalKb = (files) => files.reduce((total, file) => total + gzipKb(file), 0);
+
+const report = (label, kb, maxKb) => {
+  const line = `${label.padEnd(16)} ${kb.toFixed(1).padStart(7)} KB / ${maxKb} KB`;
+  if (kb > maxKb) fail(line);
+  else console.log(`✓ ${line}`);
+};
+
+const entry = (stats.entrypoints || {}).main;
+if (!entry) {
+  fail("entrypoint 'main' not found in bundle stats");
+  process.exit(1);
+}
+const entryFiles = jsAssets(entry);
+report("entry (initial)", totalKb(entryFiles), ENTRY_MAX_KB);
+
+const chunkNames = new Set((stats.chunks || []).flatMap((chunk) => chunk.names || []));
+for (const name of REQUIRED_CHUNKS) {
+  if (!chunkNames.has(name)) fail(`chunk '${name}' not found - check splitChunks in craco.config.js`);
+}
+
+for (const budget of ROUTE_BUDGETS) {
+  const group = (stats.namedChunkGroups || {})[budget.group];
+  if (!group) {
+    fail(`chunk group '${budget.group}' not found - check the webpackChunkName comments in App.js`);
+    continue;
+  }
+  const routeFiles = jsAssets(group).filter((file) => !entryFiles.includes(file));
+  report(budget.group, totalKb(routeFiles), budget.maxKb);
+  report(`${budget.group} route`, totalKb([...new Set([...entryFiles, ...routeFiles])]), budget.routeMaxKb);
+}
+
+if (failed) {
+  console.error("\nBundle size check failed.");
+  process.exit(1);
+}
@@ -1,25 +1,40 @@
 import "@/App.css";
+import { lazy, Suspense } from "react";
 import { BrowserRouter, Routes, Route } from "react-router-dom";
+import { Loader2 } from "lucide-react";
 import HomePage from "@/pages/HomePage";
-import SurveyPage from "@/pages/SurveyPage";
-import AdminLoginPage from "@/pages/AdminLoginPage";
-import AdminDashboard from "@/pages/AdminDashboard";
 import { Toaster } from "@/components/ui/sonner";
 
+// Route-level chunks: field users only ever download the survey chunk,
+// while the login page, dashboard and question manager share an admin chunk
+const SurveyPage = lazy(() => import(/* webpackChunkName: "survey" */ "@/pages/SurveyPage"));
+const AdminLoginPage = lazy(() => import(/* webpackChunkName: "admin" */ "@/pages/AdminLoginPage"));
+const AdminDashboard = lazy(() => import(/* webpackChunkName: "admin" */ "@/pages/AdminDashboard"));
+
+function PageLoader() {
+  return (
+    <div className="min-h-screen flex items-center justify-center bg-slate-50">
+      <Loader2 className="w-8 h-8 animate-spin text-slate-900" />
+    </div>
+  );
+}
+
 function App() {
   return (
     <div className="App">
       <BrowserRouter>
-        <Routes>
-          <Route path="/" element={<HomePage />} />
-          <Route path="/survey" element={<SurveyPage />} />
-          <Route path="/admin/login" element={<AdminLoginPage />} />
-          <Route path="/admin/dashboard" element={<AdminDashboard />} />
-        </Routes>
+        <Suspense fallback={<PageLoader />}>
+          <Routes>
+            <Route path="/" element={<HomePage />} />
+            <Route path="/survey" element={<SurveyPage />} />
+            <Route path="/admin/login" element={<AdminLoginPage />} />
+            <Route path="/admin/dashboard" element={<AdminDashboard />} />
+          </Routes>
+        </Suspense>
       </BrowserRouter>
       <Toaster />
     </div>
   );
 }
 
-export default App;
\ No newline at end of file
+export default App;
@@ -0,0 +1,27 @@
+import axios from "axios";
+
+// Attach the signed admin token to admin API calls and send the user back
+// to the login page once the server rejects it (expired or invalid).
+export const getAdminToken = () => localStorage.getItem("admin_token");
+
+const isAdminUrl = (url = "") => url.includes("/api/admin/") && !url.includes("/api/admin/login");
+
+axios.interceptors.request.use((config) => {
+  const token = getAdminToken();
+  if (token && isAdminUrl(config.url)) {
+    config.headers.Authorization = `Bearer ${token}`;
+  }
+  return config;
+});
+
+axios.interceptors.response.use(
+  (response) => response,
+  (error) => {
+    if (error.response?.status === 401 && isAdminUrl(error.config?.url)) {
+      localStorage.removeItem("admin_token");
+      localStorage.removeItem("admin_email");
+      window.location.assign("/admin/login");
+    }
+    return Promise.reject(error);
+  }
+);
@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import axios from "axios";
 import { Card } from "@/components/ui/card";
@@ -11,6 +11,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
 import { toast } from "sonner";
 import { LogOut, Download, BarChart3, FileText, TrendingUp, Loader2, Filter, Settings } from "lucide-react";
 import QuestionManagement from "./QuestionManagement";
+import { getAdminToken } from "@/lib/adminAuth";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -29,17 +30,45 @@ export default function AdminDashboard() {
     start_date: "",
     end_date: ""
   });
+  const filtersRef = useRef(filters);
 
   useEffect(() => {
-    const token = localStorage.getItem("admin_token");
+    const token = getAdminToken();
     if (!token) {
       navigate("/admin/login");
       return;
     }
     fetchData();
     fetchBranches();
+
+    // Live updates: new submissions and refreshed counters pushed by the server
+    const source = new EventSource(`${API}/admin/stream?token=${encodeURIComponent(getAdminToken())}`);
+    source.addEventListener("stats", (event) => {
+      setStats(JSON.parse(event.data));
+    });
+    source.addEventListener("submission", (event) => {
+      const submission = JSON.parse(event.data);
+      const active = filtersRef.current;
+      if (active.branch || active.section || active.start_date || active.end_date) return;
+      setResponses((current) => [submission, ...current]);
+    });
+    source.addEventListener("resync", () => {
+      fetchData();
+    });
+    // The server closes the stream if its watcher stops; EventSource then
+    // reconnects on its own, and anything missed meanwhile is refetched
+    let connected = false;
+    source.onopen = () => {
+      if (connected) fetchData();
+      connected = true;
+    };
+    return () => source.close();
   }, []);
 
+  useEffect(() => {
+    filtersRef.current = filters;
+  }, [filters]);
+
   const fetchBranches = async () => {
     try {
       const response = await axios.get(`${API}/branches`);
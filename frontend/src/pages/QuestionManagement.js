@@ -8,7 +8,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@
 import { Textarea } from "@/components/ui/textarea";
 import { Switch } from "@/components/ui/switch";
 import { toast } from "sonner";
-import { Plus, Edit2, Trash2, Save, X } from "lucide-react";
+import { Plus, Edit2, Trash2, Save, X, ArrowUp, ArrowDown } from "lucide-react";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -18,7 +18,6 @@ export default function QuestionManagement() {
   const [editingId, setEditingId] = useState(null);
   const [showAddForm, setShowAddForm] = useState(false);
   const [formData, setFormData] = useState({
-    question_number: 1,
     question_text: "",
     question_type: "single",
     options: [],
@@ -86,9 +85,26 @@ export default function QuestionManagement() {
     }
   };
 
+  const handleMoveQuestion = async (index, direction) => {
+    const target = index + direction;
+    if (target < 0 || target >= questions.length) return;
+    const reordered = [...questions];
+    [reordered[index], reordered[target]] = [reordered[target], reordered[index]];
+    try {
+      // The whole ordered set is applied atomically; only display positions
+      // change, answer keys (question_number) stay with their questions
+      const response = await axios.put(`${API}/admin/questions`, {
+        questions: reordered.map(({ created_at, updated_at, ...question }) => question)
+      });
+      setQuestions(response.data.questions);
+      toast.success("Question order updated");
+    } catch (error) {
+      toast.error("Failed to reorder questions");
+    }
+  };
+
   const handleEditQuestion = (question) => {
     setFormData({
-      question_number: question.question_number,
       question_text: question.question_text,
       question_type: question.question_type,
       options: question.options || [],
@@ -102,7 +118,6 @@ export default function QuestionManagement() {
 
   const resetForm = () => {
     setFormData({
-      question_number: questions.length + 1,
       question_text: "",
       question_type: "single",
       options: [],
@@ -147,16 +162,6 @@ export default function QuestionManagement() {
 
           <div className="space-y-4">
             <div className="grid md:grid-cols-2 gap-4">
-              <div className="space-y-2">
-                <Label>Question Number *</Label>
-                <Input
-                  type="number"
-                  value={formData.question_number}
-                  onChange={(e) => setFormData({...formData, question_number: parseInt(e.target.value)})}
-                  data-testid="question-number-input"
-                />
-              </div>
-
               <div className="space-y-2">
                 <Label>Question Type *</Label>
                 <Select value={formData.question_type} onValueChange={(value) => setFormData({...formData, question_type: value})}>
@@ -288,13 +293,13 @@ export default function QuestionManagement() {
 
       {/* Questions List */}
       <div className="space-y-4">
-        {questions.map((question) => (
+        {questions.map((question, questionIndex) => (
           <Card key={question.id} className="p-6 hover:shadow-md transition-shadow">
             <div className="flex items-start justify-between">
               <div className="flex-1">
                 <div className="flex items-center gap-3 mb-2">
                   <span className="inline-flex items-center justify-center w-8 h-8 bg-blue-100 text-blue-700 rounded-full text-sm font-bold">
-                    {question.question_number}
+                    {questionIndex + 1}
                   </span>
                   <span className="px-2 py-1 bg-slate-100 text-slate-700 text-xs font-medium rounded">
                     {question.question_type === "single" ? "Single Select" : question.question_type === "multi" ? "Multi Select" : "Text Input"}
@@ -317,6 +322,24 @@ export default function QuestionManagement() {
                 )}
               </div>
               <div className="flex gap-2">
+                <Button
+                  size="sm"
+                  variant="outline"
+                  onClick={() => handleMoveQuestion(questionIndex, -1)}
+                  disabled={questionIndex === 0}
+                  data-testid={`move-up-question-${question.id}`}
+                >
+                  <ArrowUp className="w-4 h-4" />
+                </Button>
+                <Button
+                  size="sm"
+                  variant="outline"
+                  onClick={() => handleMoveQuestion(questionIndex, 1)}
+                  disabled={questionIndex === questions.length - 1}
+                  data-testid={`move-down-question-${question.id}`}
+                >
+                  <ArrowDown className="w-4 h-4" />
+                </Button>
                 <Button
                   size="sm"
                   variant="outline"
@@ -62,7 +62,7 @@ export default function SurveyPage() {
 
   const fetchQuestions = async () => {
     try {
-      const response = await axios.get(`${API}/admin/questions`);
+      const response = await axios.get(`${API}/questions`);
       setQuestions(response.data.questions);
       
       // Initialize question answers
@@ -190,18 +190,18 @@ export default function SurveyPage() {
     });
 
     if (unansweredQuestions.length > 0) {
-      toast.error(`Please answer question ${unansweredQuestions[0].question_number}`);
+      toast.error(`Please answer question ${questions.indexOf(unansweredQuestions[0]) + 1}`);
       return;
     }
 
     // Validate conditional inputs
-    for (const q of questions) {
+    for (const [index, q] of questions.entries()) {
       if (q.has_conditional_input && q.conditional_trigger) {
         const answer = questionAnswers[q.id];
         if (Array.isArray(answer) && answer.includes(q.conditional_trigger)) {
           const conditionalAnswer = questionAnswers[`${q.id}_conditional`];
           if (!conditionalAnswer || conditionalAnswer.trim() === "") {
-            toast.error(`Please provide details for "${q.conditional_trigger}" in question ${q.question_number}`);
+            toast.error(`Please provide details for "${q.conditional_trigger}" in question ${index + 1}`);
             return;
           }
         }
@@ -479,7 +479,7 @@ export default function SurveyPage() {
                         data-testid={`question-${question.question_number}`}
                       >
                         <Label className="text-base font-semibold text-slate-900 mb-4 block">
-                          {question.question_number}. {question.question_text} {question.is_mandatory && "*"}
+                          {index + 1}. {question.question_text} {question.is_mandatory && "*"}
                         </Label>
                         
                         {question.question_type === "single" && question.options && (